@@ -1,5 +1,10 @@
+def __getattr__(name):
+    # Imported lazily so the core modules and headless tools load without Qt
+    if name == "main":
+        from .gui.main_window import main
+        return main
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-from .gui.main_window import main
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    __getattr__("main")()
@@ -0,0 +1,225 @@
+import mmap
+import struct
+
+import numpy as np
+
+from .cli_io import detect_compression, open_cli_file
+from .layer_store import LayerStore
+
+HEADER_END = b"$$HEADEREND"
+BINARY_MARKER = b"$$BINARY"
+HEADER_SCAN_SIZE = 1 << 16  # Bytes read at a time while looking for the header end
+
+# Command indices of the binary CLI geometry section (little-endian)
+CMD_LAYER_LONG = 127      # z: float32
+CMD_LAYER_SHORT = 128     # z: uint16
+CMD_POLYLINE_SHORT = 129  # id, dir, n: uint16, then 2n uint16
+CMD_POLYLINE_LONG = 130   # id, dir, n: int32, then 2n float32
+CMD_HATCHES_SHORT = 131   # id, n: uint16, then 4n uint16
+CMD_HATCHES_LONG = 132    # id, n: int32, then 4n float32
+
+_UINT16 = struct.Struct('<H')
+_FLOAT32 = struct.Struct('<f')
+_POLYLINE_SHORT = struct.Struct('<3H')
+_POLYLINE_LONG = struct.Struct('<3i')
+_HATCHES_SHORT = struct.Struct('<2H')
+_HATCHES_LONG = struct.Struct('<2i')
+
+
+def find_header_end(file_path: str):
+    """Return (header_bytes, geometry_offset, is_binary) for a CLI file"""
+    with open_cli_file(file_path) as f:
+        data = b""
+        while True:
+            chunk = f.read(HEADER_SCAN_SIZE)
+            if not chunk:
+                raise ValueError("Header end not found")
+            # Keep a marker's worth of overlap so it can't be split between chunks
+            search_from = max(len(data) - len(HEADER_END), 0)
+            data += chunk
+            end = data.find(HEADER_END, search_from)
+            if end >= 0:
+                header = data[:end]
+                return header, end + len(HEADER_END), BINARY_MARKER in header
+
+
+def _iter_records(mm, pos, end, decode=True):
+    """Walk geometry commands, yielding (command, record_offset, z_or_None, coords_or_None)
+
+    Coordinates of long records are zero-copy float32 views into the map.
+    Short records are uint16 on disk and are converted to float32. With
+    ``decode=False`` only layer commands are reported and no coordinate
+    arrays are created, which is what the layer index pre-scan needs.
+    """
+    while pos + 2 <= end:
+        record_offset = pos
+        command, = _UINT16.unpack_from(mm, pos)
+        pos += 2
+        if command == CMD_LAYER_LONG:
+            z, = _FLOAT32.unpack_from(mm, pos)
+            pos += 4
+            yield command, record_offset, z, None
+        elif command == CMD_LAYER_SHORT:
+            z, = _UINT16.unpack_from(mm, pos)
+            pos += 2
+            yield command, record_offset, float(z), None
+        elif command == CMD_HATCHES_LONG:
+            _, n = _HATCHES_LONG.unpack_from(mm, pos)
+            pos += _HATCHES_LONG.size
+            if decode:
+                coords = np.frombuffer(mm, dtype='<f4', count=4 * n, offset=pos)
+                yield command, record_offset, None, coords
+            pos += 16 * n
+        elif command == CMD_HATCHES_SHORT:
+            _, n = _HATCHES_SHORT.unpack_from(mm, pos)
+            pos += _HATCHES_SHORT.size
+            if decode:
+                coords = np.frombuffer(mm, dtype='<u2', count=4 * n, offset=pos).astype(np.float32)
+                yield command, record_offset, None, coords
+            pos += 8 * n
+        elif command == CMD_POLYLINE_LONG:
+            # Contours are not visualized, skip their coordinates
+            _, _, n = _POLYLINE_LONG.unpack_from(mm, pos)
+            pos += _POLYLINE_LONG.size + 8 * n
+        elif command == CMD_POLYLINE_SHORT:
+            _, _, n = _POLYLINE_SHORT.unpack_from(mm, pos)
+            pos += _POLYLINE_SHORT.size + 4 * n
+        else:
+            raise ValueError(f"Unknown binary CLI command {command} at byte {record_offset}")
+    if pos > end:
+        raise ValueError("Binary CLI geometry is truncated")
+
+
+def _iter_stream_records(f):
+    """Like _iter_records, but reading sequentially from a (decompressing) stream"""
+    def read_exact(size):
+        data = f.read(size)
+        if len(data) != size:
+            raise ValueError("Binary CLI geometry is truncated")
+        return data
+
+    record_offset = 0
+    while True:
+        data = f.read(2)
+        if not data:
+            return
+        if len(data) < 2:
+            raise ValueError("Binary CLI geometry is truncated")
+        command, = _UINT16.unpack(data)
+        if command == CMD_LAYER_LONG:
+            z, = _FLOAT32.unpack(read_exact(4))
+            yield command, record_offset, z, None
+            size = 4
+        elif command == CMD_LAYER_SHORT:
+            z, = _UINT16.unpack(read_exact(2))
+            yield command, record_offset, float(z), None
+            size = 2
+        elif command == CMD_HATCHES_LONG:
+            _, n = _HATCHES_LONG.unpack(read_exact(_HATCHES_LONG.size))
+            yield command, record_offset, None, np.frombuffer(read_exact(16 * n), dtype='<f4')
+            size = _HATCHES_LONG.size + 16 * n
+        elif command == CMD_HATCHES_SHORT:
+            _, n = _HATCHES_SHORT.unpack(read_exact(_HATCHES_SHORT.size))
+            yield command, record_offset, None, np.frombuffer(read_exact(8 * n), dtype='<u2').astype(np.float32)
+            size = _HATCHES_SHORT.size + 8 * n
+        elif command == CMD_POLYLINE_LONG:
+            _, _, n = _POLYLINE_LONG.unpack(read_exact(_POLYLINE_LONG.size))
+            read_exact(8 * n)
+            size = _POLYLINE_LONG.size + 8 * n
+        elif command == CMD_POLYLINE_SHORT:
+            _, _, n = _POLYLINE_SHORT.unpack(read_exact(_POLYLINE_SHORT.size))
+            read_exact(4 * n)
+            size = _POLYLINE_SHORT.size + 4 * n
+        else:
+            raise ValueError(f"Unknown binary CLI command {command} at geometry byte {record_offset}")
+        record_offset += 2 + size
+
+
+def _decode_layers(records, units, store, first_layer_number):
+    """Yield every layer found in a stream of geometry records"""
+    current_layer = None  # (layer_number, z) of the layer being read
+    chunks = []  # Zero-copy coordinate views of the current layer
+    counts = []
+    coords = None
+    layer_number = first_layer_number
+
+    try:
+        for _, _, z, coords in records:
+            if z is not None:
+                if current_layer is not None:
+                    yield _append_layer(store, current_layer, chunks, counts, units)
+                    chunks = []
+                    counts = []
+                current_layer = (layer_number, z * units)
+                layer_number += 1
+            elif current_layer is not None:
+                chunks.append(coords)
+                counts.append(len(coords) // 2)
+
+        if current_layer is not None:
+            yield _append_layer(store, current_layer, chunks, counts, units)
+    finally:
+        # Views into the map must be gone before it can be closed
+        chunks = coords = None
+
+
+def iter_binary_layers(file_path: str, header: dict, geometry_offset: int, store: LayerStore = None):
+    """Yield layers of a binary CLI file from a memory map (or a stream if compressed)
+
+    Each $$HATCHES record becomes one hatch whose points are the record's
+    start/end coordinates in file order, so layers have the same structure
+    as the ASCII parser produces. Layer z comes from the layer command and
+    layers are numbered in file order.
+    """
+    if store is None:
+        store = LayerStore()
+    units = header['units']
+
+    if detect_compression(file_path) is not None:
+        # Compressed files can't be mapped, decode them as a forward-only stream
+        with open_cli_file(file_path) as f:
+            f.read(geometry_offset)
+            yield from _decode_layers(_iter_stream_records(f), units, store, len(store))
+        return
+
+    with open(file_path, 'rb') as f:
+        if f.seek(0, 2) <= geometry_offset:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            records = _iter_records(mm, geometry_offset, len(mm))
+            try:
+                yield from _decode_layers(records, units, store, len(store))
+            finally:
+                # A paused record walk still holds a view into the map, drop it
+                # so the map can be closed when the caller stops early
+                records.close()
+                records = None
+
+
+def scan_binary_layers(mm, geometry_offset: int):
+    """Return the byte offset and raw z of every layer command, without decoding geometry"""
+    offsets = []
+    z_values = []
+    for _, record_offset, z, _ in _iter_records(mm, geometry_offset, len(mm), decode=False):
+        offsets.append(record_offset)
+        z_values.append(z)
+    return offsets, z_values
+
+
+def decode_binary_layer(mm, start: int, end: int, units: float, layer_number: int, store: LayerStore):
+    """Decode the single layer stored between two byte offsets into store"""
+    for layer in _decode_layers(_iter_records(mm, start, end), units, store, layer_number):
+        return layer
+    return None
+
+
+def _append_layer(store, current_layer, chunks, counts, units):
+    """Scale one layer's coordinates and copy them into the store"""
+    layer_num, z = current_layer
+    if chunks:
+        coords = np.concatenate(chunks)
+        coords *= units
+    else:
+        coords = np.empty(0, dtype=np.float32)
+    print(f"Found layer {layer_num} at z={z:.4f}mm")
+    return store.append_layer(layer_num, z, coords, counts)
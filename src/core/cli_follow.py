@@ -0,0 +1,98 @@
+import os
+
+from .cli_binary import BINARY_MARKER, HEADER_END
+from .cli_index import find_layer_markers
+from .cli_io import detect_compression
+from .cli_parser import parse_layer_block, read_cli_header
+from .layer_store import LayerStore
+
+GEOMETRY_END = b"$$GEOMETRYEND"
+
+
+class CliFollower:
+    """Incrementally parse an ASCII CLI file that is still being written
+
+    The file stays open and only bytes appended since the last ``poll()``
+    are read. A layer block is parsed once the next $$LAYER/ marker (or
+    $$GEOMETRYEND) shows that the writer has moved past it; the last,
+    possibly incomplete block is held back until then. New layers are
+    appended to ``store``.
+    """
+
+    def __init__(self, file_path: str, store: LayerStore = None):
+        if detect_compression(file_path) is not None:
+            raise ValueError("Compressed CLI files can't be followed")
+        self.file_path = file_path
+        self.store = store if store is not None else LayerStore()
+        self.header = {}  # Filled once $$HEADEREND has been written
+        self.finished = False  # True once $$GEOMETRYEND has been parsed
+        self._file = open(file_path, 'rb')
+        self._read_offset = 0  # Bytes of the file consumed so far
+        self._pending = b""  # Read but not yet parsed: partial header or last layer block
+
+    def poll(self) -> int:
+        """Parse whatever was appended since the last call, return the number of new layers"""
+        if self.finished:
+            return 0
+        size = os.fstat(self._file.fileno()).st_size
+        if size < self._read_offset:
+            raise ValueError(f"{self.file_path} was truncated while being followed")
+        if size > self._read_offset:
+            self._file.seek(self._read_offset)
+            data = self._file.read(size - self._read_offset)
+            self._read_offset += len(data)
+            self._pending += data
+
+        if not self.header and not self._read_header():
+            return 0
+        return self._parse_complete_layers()
+
+    def _read_header(self) -> bool:
+        """Parse the header once it is complete, return True if it was"""
+        end = self._pending.find(HEADER_END)
+        if end < 0:
+            return False
+        header_bytes = self._pending[:end]
+        if BINARY_MARKER in header_bytes:
+            raise ValueError("Binary CLI files can't be followed")
+        header_lines = header_bytes.decode('ascii', errors='replace').splitlines()
+        self.header.update(read_cli_header(header_lines + ["$$HEADEREND"]))
+        self._pending = self._pending[end + len(HEADER_END):]
+        return True
+
+    def _parse_complete_layers(self) -> int:
+        """Parse every layer block followed by another marker or the geometry end"""
+        pending = self._pending
+        block_starts = [offset for offset, _ in find_layer_markers(pending, 0)]
+        geometry_end = pending.find(GEOMETRY_END, block_starts[-1] if block_starts else 0)
+        if geometry_end >= 0:
+            block_starts.append(geometry_end)
+            self.finished = True
+
+        n_layers = len(self.store)
+        for start, end in zip(block_starts[:-1], block_starts[1:]):
+            parse_layer_block(pending[start:end].decode('ascii', errors='replace'), self.header, self.store)
+        if block_starts:
+            self._pending = pending[block_starts[-1]:]
+        if self.finished:
+            self._pending = b""
+        return len(self.store) - n_layers
+
+    def finish(self) -> int:
+        """Parse the held back last block as complete, e.g. once the writer has exited"""
+        n_layers = self.poll()
+        if self.header and not self.finished and self._pending:
+            if parse_layer_block(self._pending.decode('ascii', errors='replace'), self.header, self.store):
+                n_layers += 1
+        self._pending = b""
+        self.finished = True
+        return n_layers
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
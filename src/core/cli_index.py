@@ -0,0 +1,208 @@
+import hashlib
+import mmap
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from platformdirs import user_cache_dir
+
+from .cli_binary import decode_binary_layer, find_header_end, scan_binary_layers
+from .cli_io import detect_compression
+from .cli_parser import parse_layer_block, parse_layer_line, read_cli_header
+from .layer_store import LayerStore
+
+INDEX_VERSION = 1
+INDEX_SUFFIX = ".idx"
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024  # Memory budget for decoded layers
+INDEXED_LOAD_BYTES = 256 * 1024 * 1024  # Files this large are opened through the index instead of fully parsed
+
+_LAYER_MARKER = b"$$LAYER/"
+
+
+def find_layer_markers(mm, geometry_offset: int):
+    """Return (line_offset, line) of every $$LAYER/ line in an ASCII geometry section"""
+    markers = []
+    pos = mm.find(_LAYER_MARKER, geometry_offset)
+    while pos >= 0:
+        line_start = mm.rfind(b"\n", geometry_offset, pos) + 1 or geometry_offset
+        line_end = mm.find(b"\n", pos)
+        if line_end < 0:
+            line_end = len(mm)
+        # Only markers at the start of a line (after indentation) count
+        if not mm[line_start:pos].strip():
+            markers.append((line_start, mm[line_start:line_end]))
+        pos = mm.find(_LAYER_MARKER, line_end)
+    return markers
+
+
+def index_cache_path(file_path: str) -> str:
+    """Where the layer index of file_path is persisted, keyed by its absolute path"""
+    key = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()
+    return os.path.join(user_cache_dir("pathexplorer"), "index", key + INDEX_SUFFIX)
+
+
+class CliFile:
+    """Indexed, lazily decoded CLI file
+
+    Opening only pre-scans the file for the byte offset of every layer
+    marker. Indexing a layer seeks to its block and decodes just that
+    layer, keeping recently used layers in an LRU bounded by
+    ``cache_bytes``. The index can be persisted in the user cache
+    directory (never next to the file) so reopening skips the pre-scan
+    entirely.
+    """
+
+    def __init__(self, file_path: str, cache_bytes: int = DEFAULT_CACHE_BYTES, use_index_cache: bool = True):
+        if detect_compression(file_path) is not None:
+            raise ValueError("Compressed CLI files can't be indexed, parse them instead")
+        self.file_path = file_path
+        self.cache_bytes = cache_bytes
+        self._cache = OrderedDict()  # layer index -> single-layer LayerStore
+        self._cached_bytes = 0
+        self._lock = threading.Lock()  # Layers may be decoded from a prefetch thread
+
+        header_bytes, self.geometry_offset, self.is_binary = find_header_end(file_path)
+        header_lines = header_bytes.decode('ascii', errors='replace').splitlines()
+        self.header = read_cli_header(header_lines + ["$$HEADEREND"])
+        self.total_layers_header = self.header['total_layers_header']
+
+        self._mm = None
+        self._file = open(file_path, 'rb')
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+            index = self._load_index() if use_index_cache else None
+            if index is None:
+                index = self._scan()
+                if use_index_cache:
+                    self._save_index(index)
+        except BaseException:
+            self.close()
+            raise
+        self.starts, self.ends, self.layer_numbers, self.z = index
+
+    # Index construction
+    def _scan(self):
+        """Find every layer's byte range, layer number and z"""
+        if self._mm is None:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, empty, np.empty(0, dtype=np.float64)
+
+        if self.is_binary:
+            offsets, raw_z = scan_binary_layers(self._mm, self.geometry_offset)
+            starts = np.array(offsets, dtype=np.int64)
+            ends = np.append(starts[1:], len(self._mm)).astype(np.int64)
+            layer_numbers = np.arange(len(starts), dtype=np.int64)
+            z = np.array(raw_z, dtype=np.float64) * self.header['units']
+            return starts, ends, layer_numbers, z
+
+        markers = find_layer_markers(self._mm, self.geometry_offset)
+        starts, ends, layer_numbers, z = [], [], [], []
+        for i, (offset, line) in enumerate(markers):
+            # Malformed markers still end the previous layer but are skipped themselves
+            layer = parse_layer_line(line.decode('ascii', errors='replace').strip(), self.header, verbose=False)
+            if layer is None:
+                continue
+            starts.append(offset)
+            ends.append(markers[i + 1][0] if i + 1 < len(markers) else len(self._mm))
+            layer_numbers.append(layer[0])
+            z.append(layer[1])
+        return (np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64),
+                np.array(layer_numbers, dtype=np.int64), np.array(z, dtype=np.float64))
+
+    def _source_stamp(self):
+        stat = os.stat(self.file_path)
+        return np.array([INDEX_VERSION, stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+    def _load_index(self):
+        """Return the persisted index if it matches the file, else None"""
+        try:
+            with np.load(index_cache_path(self.file_path)) as data:
+                if not np.array_equal(data['source'], self._source_stamp()):
+                    return None
+                return data['starts'], data['ends'], data['layer_numbers'], data['z']
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _save_index(self, index):
+        """Persist the index in the user cache, skipped if it isn't writable"""
+        starts, ends, layer_numbers, z = index
+        path = index_cache_path(self.file_path)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # An open handle keeps numpy from appending .npz to the name
+            with open(path, 'wb') as f:
+                np.savez(f, source=self._source_stamp(), starts=starts, ends=ends,
+                         layer_numbers=layer_numbers, z=z)
+        except OSError as e:
+            print(f"Could not write layer index: {e}")
+
+    # Layer access
+    def _decode(self, index):
+        store = LayerStore(point_capacity=1024, hatch_capacity=64, layer_capacity=1)
+        start, end = int(self.starts[index]), int(self.ends[index])
+        if self.is_binary:
+            decode_binary_layer(self._mm, start, end, self.header['units'],
+                                int(self.layer_numbers[index]), store)
+        else:
+            parse_layer_block(self._mm[start:end].decode('ascii', errors='replace'), self.header, store)
+        store.compact()
+        return store
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("layer index out of range")
+
+        with self._lock:
+            store = self._cache.get(index)
+            if store is not None:
+                self._cache.move_to_end(index)
+                return store[0]
+
+            store = self._decode(index)
+            self._cache[index] = store
+            self._cached_bytes += store.nbytes
+            # Evict least recently used layers, always keeping the one just decoded
+            while self._cached_bytes > self.cache_bytes and len(self._cache) > 1:
+                _, evicted = self._cache.popitem(last=False)
+                self._cached_bytes -= evicted.nbytes
+            return store[0]
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def bounds(self):
+        """Return (min_xyz, max_xyz) from the header dimension and layer z, or None"""
+        dimension = self.header.get('dimension')
+        if dimension is None or not len(self):
+            return None
+        units = self.header['units']
+        min_coords = np.array([dimension[0] * units, dimension[1] * units, self.z.min()])
+        max_coords = np.array([dimension[3] * units, dimension[4] * units, self.z.max()])
+        return min_coords, max_coords
+
+    def compact(self):
+        """Nothing to release, layers are decoded on demand"""
+
+    def close(self):
+        """Release the memory map and file handle"""
+        self._cache.clear()
+        self._cached_bytes = 0
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
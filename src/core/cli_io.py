@@ -0,0 +1,64 @@
+import bz2
+import gzip
+import io
+import lzma
+
+READ_BUFFER_SIZE = 1 << 20  # Bytes read from disk per chunk
+
+# Leading bytes of the supported compressed containers
+MAGIC_BYTES = {
+    b"\x1f\x8b": "gzip",
+    b"\xfd7zXZ\x00": "xz",
+    b"BZh": "bz2",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+
+
+def detect_compression(file_path: str):
+    """Return 'gzip', 'xz', 'bz2' or 'zstd' from the file's magic bytes, None if uncompressed"""
+    with open(file_path, 'rb') as f:
+        head = f.read(6)
+    for magic, name in MAGIC_BYTES.items():
+        if head.startswith(magic):
+            return name
+    return None
+
+
+def _open_zstd(file_path: str):
+    """Open a zstd stream with whichever zstd implementation is installed"""
+    try:
+        from compression import zstd  # Python 3.14+
+        return zstd.open(file_path, 'rb')
+    except ImportError:
+        pass
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError("Reading zstd-compressed CLI files needs the 'zstandard' package")
+    return zstandard.open(file_path, 'rb')
+
+
+def open_cli_file(file_path: str, text: bool = False):
+    """Open a CLI file for streaming reads, decompressing on the fly
+
+    Compression is detected from magic bytes, so the file name doesn't
+    matter. Nothing is decompressed to disk or held in memory beyond the
+    read buffer. With ``text=True`` a line-iterable text stream is returned.
+    """
+    compression = detect_compression(file_path)
+    if compression == "gzip":
+        f = gzip.open(file_path, 'rb')
+    elif compression == "xz":
+        f = lzma.open(file_path, 'rb')
+    elif compression == "bz2":
+        f = bz2.open(file_path, 'rb')
+    elif compression == "zstd":
+        f = _open_zstd(file_path)
+    else:
+        f = open(file_path, 'rb', buffering=READ_BUFFER_SIZE)
+
+    if compression is not None:
+        f = io.BufferedReader(f, READ_BUFFER_SIZE)
+    if text:
+        return io.TextIOWrapper(f, encoding='utf-8', errors='replace')
+    return f
@@ -0,0 +1,64 @@
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .cli_index import find_layer_markers
+from .cli_parser import parse_layer_block
+from .layer_store import LayerStore
+
+PARALLEL_MIN_BYTES = 32 * 1024 * 1024  # Smaller files are parsed serially
+CHUNKS_PER_WORKER = 4  # More chunks than workers keeps the pool busy on uneven layers
+
+
+def _parse_chunk(file_path: str, header: dict, block_offsets):
+    """Worker: parse consecutive $$LAYER/ blocks, return the store's arrays"""
+    start, end = int(block_offsets[0]), int(block_offsets[-1])
+    with open(file_path, 'rb') as f:
+        f.seek(start)
+        text = f.read(end - start).decode('ascii', errors='replace')
+
+    store = LayerStore()
+    relative = [int(offset) - start for offset in block_offsets]
+    for block_start, block_end in zip(relative[:-1], relative[1:]):
+        parse_layer_block(text[block_start:block_end], header, store)
+    store.compact()
+    return store.coords, store.hatch_offsets, store.layer_offsets, store.z, store.layer_numbers, store.stats
+
+
+def split_layer_chunks(block_starts, end: int, n_chunks: int):
+    """Group layer blocks into about n_chunks contiguous byte ranges of similar size
+
+    Returns a list of offset arrays; each array holds the start of every
+    block in the chunk followed by the end of the last one.
+    """
+    boundaries = np.append(np.asarray(block_starts, dtype=np.int64), end)
+    if len(boundaries) < 2:
+        return []
+    # Cut where the cumulative byte count crosses equal shares of the section
+    targets = np.linspace(boundaries[0], end, n_chunks + 1)[1:-1]
+    cuts = np.unique(np.searchsorted(boundaries, targets))
+    cuts = cuts[(cuts > 0) & (cuts < len(boundaries) - 1)]
+    edges = np.concatenate(([0], cuts, [len(boundaries) - 1]))
+    return [boundaries[a:b + 1] for a, b in zip(edges[:-1], edges[1:])]
+
+
+def parse_layers_parallel(file_path: str, header: dict, geometry_offset: int, workers: int) -> LayerStore:
+    """Parse an ASCII geometry section on several processes and stitch the layers in order"""
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            block_starts = [offset for offset, _ in find_layer_markers(mm, geometry_offset)]
+            end = len(mm)
+
+    chunks = split_layer_chunks(block_starts, end, workers * CHUNKS_PER_WORKER)
+    print(f"Parsing {len(block_starts)} layer blocks in {len(chunks)} chunks on {workers} processes")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_parse_chunk, [file_path] * len(chunks), [header] * len(chunks), chunks)
+        parts = [LayerStore.from_arrays(*arrays) for arrays in results]
+    return LayerStore.concatenate(parts)
+
+
+def default_workers() -> int:
+    """Number of worker processes used when none is requested"""
+    return os.cpu_count() or 1
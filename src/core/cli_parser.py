@@ -1,106 +1,263 @@
-def parse_cli(file_path: str) -> dict:
-    """Robust parser for .cli files with the specific format"""
-    layers = []
-    units = 0.001  # Default unit conversion (micrometers to mm)
-    minZ = maxZ = 0.0
-    total_layers_header = 0  # Renamed for clarity
-    layer_height = 0.0
-    
+import os
+
+import numpy as np
+
+from .cli_binary import find_header_end, iter_binary_layers
+from .cli_io import detect_compression, open_cli_file
+from .layer_store import LayerStore
+
+
+def _parse_header_line(line: str, header: dict) -> None:
+    """Update header dict from a single header line"""
+    if line.startswith("$$UNITS/"):
+        header['units'] = float(line.split('/')[1])
+    elif line.startswith("$$DIMENSION/"):
+        dim_data = line.split('/')[1].split(',')
+        header['dimension'] = [float(v) for v in dim_data[:6]]
+    elif line.startswith("$$LAYERS/"):
+        header['total_layers_header'] = int(line.split('/')[1])  # Store header value
+
+
+def _finish_header(header: dict) -> None:
+    """Derive z range and layer height once the whole header is known"""
+    units = header['units']
+    dimension = header.get('dimension')
+    if dimension is not None:
+        header['minZ'] = dimension[2] * units
+        header['maxZ'] = dimension[5] * units
+    # Calculate layer height based on header dimension
+    if header['total_layers_header'] > 1:
+        header['layer_height'] = (header['maxZ'] - header['minZ']) / (header['total_layers_header'] - 1)
+    else:
+        header['layer_height'] = 0
+
+
+def read_cli_header(f) -> dict:
+    """Read header lines from an open file (or any line iterable) up to and including $$HEADEREND"""
+    header = {
+        'units': 0.001,  # Default unit conversion (micrometers to mm)
+        'minZ': 0.0,
+        'maxZ': 0.0,
+        'total_layers_header': 0,
+        'layer_height': 0.0,
+    }
+    for line in f:
+        line = line.strip()
+        if line == "$$HEADEREND":
+            _finish_header(header)
+            return header
+        _parse_header_line(line, header)
+    raise ValueError("Header end not found")
+
+
+def iter_cli_layers(file_path: str, header: dict = None, store: LayerStore = None):
+    """Yield layers one by one as soon as each $$LAYER/ block is complete
+
+    The file is read in buffered chunks (decompressing gzip/xz/bz2/zstd
+    input on the fly), so memory use is bounded by the largest layer
+    rather than the file size. Binary CLI files are detected
+    from their header and decoded from a memory map instead. Layers are appended to
+    ``store`` (a new LayerStore if omitted) and yielded as LayerView
+    objects. If a dict is passed as ``header`` it is filled with the parsed
+    header values before the first layer is yielded.
+    """
+    if store is None:
+        store = LayerStore()
+
+    # Binary CLI files are flagged with $$BINARY in their ASCII header
+    header_bytes, geometry_offset, is_binary = find_header_end(file_path)
+    if is_binary:
+        header_lines = header_bytes.decode('ascii', errors='replace').splitlines()
+        parsed_header = read_cli_header(header_lines + ["$$HEADEREND"])
+        if header is not None:
+            header.update(parsed_header)
+        yield from iter_binary_layers(file_path, parsed_header, geometry_offset, store)
+        return
+
+    with open_cli_file(file_path, text=True) as f:
+        parsed_header = read_cli_header(f)
+        if header is not None:
+            header.update(parsed_header)
+
+        units = parsed_header['units']
+        current_layer = None  # (layer_number, z) of the layer being read
+        hatch_lines = []  # Raw $$HATCHES/ lines of the current layer
+
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+
+            # Start of a new layer
+            if line.startswith('$$LAYER/'):
+                # Hand out previous layer if exists
+                if current_layer is not None:
+                    yield store.append_layer(*current_layer, *decode_hatch_lines(hatch_lines, units))
+                    hatch_lines = []
+                current_layer = parse_layer_line(line, parsed_header)
+
+            # Hatch data
+            elif line.startswith('$$HATCHES/') and current_layer is not None:
+                hatch_lines.append(line)
+
+        # Hand out the last layer if exists
+        if current_layer is not None:
+            yield store.append_layer(*current_layer, *decode_hatch_lines(hatch_lines, units))
+
+
+def parse_layer_line(line: str, header: dict, verbose: bool = True):
+    """Return (layer_number, z) for a $$LAYER/ line, or None if it is malformed"""
+    try:
+        layer_num = int(line.split('/')[1])
+        # Z height from the original layer number and the header dimension
+        z = header['minZ'] + layer_num * header['layer_height']
+        if verbose:
+            print(f"Found layer {layer_num} at z={z:.4f}mm")
+        return layer_num, z
+    except Exception as e:
+        if verbose:
+            print(f"Error parsing layer: {line} - {str(e)}")
+        return None
+
+
+def decode_hatch_lines(lines, units: float):
+    """Decode a layer's $$HATCHES/ lines into flat x, y values and per-hatch point counts
+
+    All coordinate text of the layer is converted in a single NumPy call.
+    Layers containing anything the bulk path can't reproduce exactly
+    (malformed numbers, odd coordinate counts, ...) are decoded line by
+    line instead, skipping and reporting only the bad hatches.
+    """
+    decoded = _decode_hatch_lines_bulk(lines, units)
+    if decoded is None:
+        decoded = _decode_hatch_lines_per_line(lines, units)
+    return decoded
+
+
+def _decode_hatch_lines_bulk(lines, units: float):
+    """Vectorized decode, returns None if the per-line fallback is needed"""
+    if not lines:
+        return np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64)
+
+    point_counts = []
+    token_counts = []
+    texts = []
+    try:
+        for line in lines:
+            _, point_count, text = line[len('$$HATCHES/'):].split(',', 2)
+            point_counts.append(int(point_count))
+            if text:
+                token_counts.append(text.count(',') + 1)
+                texts.append(text)
+            else:
+                token_counts.append(0)  # A hatch without coordinates, e.g. $$HATCHES/1,0,
+    except ValueError:
+        return None
+
+    point_counts = np.array(point_counts, dtype=np.int64)
+    token_counts = np.array(token_counts, dtype=np.int64)
+    # Like the per-line path, only the first 2 * point_count values of a hatch are used
+    taken = np.minimum(token_counts, 2 * point_counts)
+    if np.any(point_counts < 0) or np.any(taken % 2):
+        return None
+
+    if not texts:
+        values = np.empty(0, dtype=np.float64)  # np.loadtxt warns about empty input
+    else:
+        try:
+            # One row of comma separated values through NumPy's C tokenizer
+            values = np.loadtxt([','.join(texts)], delimiter=',', dtype=np.float64, ndmin=1)
+        except ValueError:
+            return None
+    if len(values) != token_counts.sum():
+        return None
+
+    if np.any(taken != token_counts):
+        # Drop surplus values past each hatch's declared point count
+        token_starts = np.cumsum(token_counts) - token_counts
+        taken_starts = np.cumsum(taken) - taken
+        values = values[np.arange(taken.sum()) + np.repeat(token_starts - taken_starts, taken)]
+
+    values *= units
+    return values, taken // 2
+
+
+def _decode_hatch_lines_per_line(lines, units: float):
+    """Tolerant per-line decode, skipping hatches that fail to parse"""
+    coords = []
+    counts = []
+    for line in lines:
+        try:
+            data = line[len('$$HATCHES/'):].split(',')
+            point_count = int(data[1])
+            hatch_coords = [float(x) * units for x in data[2:2 + point_count * 2]]
+            if len(hatch_coords) % 2:
+                raise ValueError("odd number of coordinates")
+
+            coords.extend(hatch_coords)
+            counts.append(len(hatch_coords) // 2)
+        except Exception as e:
+            print(f"Error parsing hatch: {line} - {str(e)}")
+    return coords, counts
+
+
+def parse_layer_block(text: str, header: dict, store: LayerStore):
+    """Parse the text of a single $$LAYER/ block into store, return its view or None"""
+    lines = text.splitlines()
+    current_layer = parse_layer_line(lines[0].strip(), header) if lines else None
+    if current_layer is None:
+        return None
+    hatch_lines = []
+    for line in lines[1:]:
+        line = line.strip()
+        if line.startswith('$$HATCHES/'):
+            hatch_lines.append(line)
+    return store.append_layer(*current_layer, *decode_hatch_lines(hatch_lines, header['units']))
+
+
+def parse_cli(file_path: str, workers: int = 1, parallel_min_bytes: int = None) -> dict:
+    """Robust parser for .cli files with the specific format
+
+    With ``workers`` > 1 (or None for one per CPU) ASCII files of at least
+    ``parallel_min_bytes`` are split at layer boundaries and parsed on a
+    process pool; the result is identical to the serial parse.
+    """
+    from .cli_parallel import PARALLEL_MIN_BYTES, default_workers, parse_layers_parallel
     print(f"Parsing CLI file: {file_path}")
-    
-    with open(file_path, 'r') as f:
-        content = f.read()
-    
-    lines = content.splitlines()
-    header_end_index = None
-        
-    # Find header end
-    for i, line in enumerate(lines):
-        if line.strip() == "$$HEADEREND":
-            header_end_index = i
-            break
-            
-    if header_end_index is None:
-        raise ValueError("Header end not found")
-    
-    # Parse header information
-    for i in range(header_end_index + 1):
-        line = lines[i].strip()
-        if line.startswith("$$UNITS/"):
-            units = float(line.split('/')[1])
-        elif line.startswith("$$DIMENSION/"):
-            dim_data = line.split('/')[1].split(',')
-            minZ = float(dim_data[2]) * units
-            maxZ = float(dim_data[5]) * units
-        elif line.startswith("$$LAYERS/"):
-            total_layers_header = int(line.split('/')[1])  # Store header value
-    
-    # Parse geometry section
-    current_layer = None
-
-    for i in range(header_end_index + 1, len(lines)):
-        line = lines[i].strip()
-        if not line:
-            continue
-            
-        # Start of a new layer
-        if line.startswith('$$LAYER/'):
-            # Save previous layer if exists
-            if current_layer is not None:
-                layers.append(current_layer)
-                
-            try:
-                layer_num = int(line.split('/')[1])
-                # Calculate layer height based on header dimension
-                if total_layers_header > 1:
-                    layer_height = (maxZ - minZ) / (total_layers_header - 1)
-                else:
-                    layer_height = 0
-                    
-                z = minZ + layer_num * layer_height
-                current_layer = {
-                    'layer_number': layer_num,  # Original layer number
-                    'z': z,
-                    'hatches': [],
-                    'contours': []
-                }
-                print(f"Found layer {layer_num} at z={z:.4f}mm")
-            except Exception as e:
-                print(f"Error parsing layer: {line} - {str(e)}")
-                current_layer = None
-                
-        # Hatch data
-        elif line.startswith('$$HATCHES/') and current_layer is not None:
-            try:
-                data = line[len('$$HATCHES/'):].split(',')
-                point_count = int(data[1])
-                coords = [float(x) * units for x in data[2:2 + point_count * 2]]
-                
-                # Convert to point pairs
-                points = []
-                for j in range(0, len(coords), 2):
-                    points.append((coords[j], coords[j+1]))
-                
-                current_layer['hatches'].append(points)
-            except Exception as e:
-                print(f"Error parsing hatch: {line} - {str(e)}")
-    
-    # Add the last layer if exists
-    if current_layer is not None:
-        layers.append(current_layer)
-    
+
+    if workers is None:
+        workers = default_workers()
+    if parallel_min_bytes is None:
+        parallel_min_bytes = PARALLEL_MIN_BYTES
+
+    header_bytes, geometry_offset, is_binary = find_header_end(file_path)
+    parallel = (workers > 1 and not is_binary and detect_compression(file_path) is None
+                and os.path.getsize(file_path) >= parallel_min_bytes)
+
+    if parallel:
+        header_lines = header_bytes.decode('ascii', errors='replace').splitlines()
+        header = read_cli_header(header_lines + ["$$HEADEREND"])
+        store = parse_layers_parallel(file_path, header, geometry_offset, workers)
+    else:
+        header = {}
+        store = LayerStore()
+        for _ in iter_cli_layers(file_path, header, store):
+            pass
+        store.compact()
+
     # Count actual layers
-    actual_layers = len(layers)
-    
+    actual_layers = len(store)
+    total_layers_header = header['total_layers_header']
+
     # Print summary statistics
-    hatch_count = sum(len(layer['hatches']) for layer in layers)
-    
+    hatch_count = store.n_hatches
+
     print(f"Header specified {total_layers_header} layers")
     print(f"Found {actual_layers} layers in the geometry section")
     print(f"Total hatches: {hatch_count}")
-    
+
     return {
-        'layers': layers,
+        'layers': store,
         'total_layers_header': total_layers_header,
         'actual_layers': actual_layers
-    }
\ No newline at end of file
+    }
@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+from platformdirs import user_cache_dir
+
+from .layer_store import LayerStore
+
+CACHE_VERSION = 2
+DEFAULT_CACHE_LIMIT = 4 * 1024 * 1024 * 1024  # Bytes kept on disk before evicting
+STAGING_SUFFIX = ".tmp"  # Entries are written as <key>.tmp<pid> and renamed when complete
+STORE_ARRAYS = ('coords', 'hatch_offsets', 'layer_offsets', 'z', 'layer_numbers', 'stats')
+META_FILE = "meta.json"
+
+
+def cache_dir() -> str:
+    """Directory holding cached geometry, one sub-directory per file"""
+    return os.path.join(user_cache_dir("pathexplorer"), "geometry")
+
+
+def cache_key(file_path: str) -> str:
+    """Key identifying a file by absolute path, size and modification time"""
+    stat = os.stat(file_path)
+    identity = f"{os.path.abspath(file_path)}|{stat.st_size}|{stat.st_mtime_ns}|{CACHE_VERSION}"
+    return hashlib.sha1(identity.encode('utf-8')).hexdigest()
+
+
+def load_cached(file_path: str):
+    """Return cached cli_data for file_path with memory-mapped layers, or None
+
+    Cached arrays are opened with ``np.load(mmap_mode='r')``, so only the
+    pages a view actually touches are read from disk.
+    """
+    entry = os.path.join(cache_dir(), cache_key(file_path))
+    try:
+        with open(os.path.join(entry, META_FILE)) as f:
+            meta = json.load(f)
+        arrays = [np.load(os.path.join(entry, f"{name}.npy"), mmap_mode='r') for name in STORE_ARRAYS]
+    except (OSError, ValueError):
+        return None
+
+    # Mark as recently used for eviction, a read-only entry is still usable
+    try:
+        os.utime(os.path.join(entry, META_FILE))
+    except OSError:
+        pass
+    store = LayerStore.from_arrays(*arrays)
+    bounds = meta.get('bounds')
+    return {
+        'layers': store,
+        'total_layers_header': meta['total_layers_header'],
+        'actual_layers': len(store),
+        'header': meta['header'],
+        'bounds': tuple(np.array(b) for b in bounds) if bounds else None,
+    }
+
+
+def save_cached(file_path: str, cli_data: dict, header: dict = None, limit_bytes: int = DEFAULT_CACHE_LIMIT):
+    """Write parsed layers of file_path to the cache, then evict down to limit_bytes"""
+    store = cli_data['layers']
+    if store.nbytes > limit_bytes:
+        return
+    root = cache_dir()
+    entry = os.path.join(root, cache_key(file_path))
+    staging = f"{entry}{STAGING_SUFFIX}{os.getpid()}"
+    bounds = store.bounds()
+    meta = {
+        'source': os.path.abspath(file_path),
+        'total_layers_header': cli_data['total_layers_header'],
+        'header': header or {},
+        'bounds': [b.tolist() for b in bounds] if bounds else None,
+    }
+    try:
+        os.makedirs(staging, exist_ok=True)
+        for name in STORE_ARRAYS:
+            np.save(os.path.join(staging, f"{name}.npy"), np.ascontiguousarray(getattr(store, name)))
+        with open(os.path.join(staging, META_FILE), 'w') as f:
+            json.dump(meta, f)
+        # Publish atomically so readers never see a half written entry
+        shutil.rmtree(entry, ignore_errors=True)
+        os.replace(staging, entry)
+    except OSError as e:
+        print(f"Could not cache parsed geometry: {e}")
+        shutil.rmtree(staging, ignore_errors=True)
+        return
+    evict(limit_bytes)
+
+
+def _entry_size(entry: str) -> int:
+    return sum(entry_file.stat().st_size for entry_file in os.scandir(entry) if entry_file.is_file())
+
+
+def evict(limit_bytes: int = DEFAULT_CACHE_LIMIT):
+    """Remove least recently used entries until the cache fits in limit_bytes"""
+    root = cache_dir()
+    if not os.path.isdir(root):
+        return
+    entries = []
+    for entry in os.scandir(root):
+        # Staging directories may be being written by another process
+        if not entry.is_dir() or STAGING_SUFFIX in entry.name:
+            continue
+        try:
+            last_used = os.stat(os.path.join(entry.path, META_FILE)).st_mtime
+        except OSError:
+            last_used = 0  # Incomplete entries go first
+        entries.append((last_used, _entry_size(entry.path), entry.path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= limit_bytes:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        print(f"Evicted cached geometry {os.path.basename(path)} ({size / 1e6:.1f} MB)")
+
+
+def clear():
+    """Remove every cached entry"""
+    shutil.rmtree(cache_dir(), ignore_errors=True)
+
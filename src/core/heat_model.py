@@ -1,6 +1,23 @@
 import numpy as np
 import pyvista as pv
 
+from .heat_splat import distance_to_segment, hatch_segments, splat_fft, splat_max, splat_segments_max
+from .scan_path import scan_path
+
+
+def heat_image(x0, y0, z, spacing, temps):
+    """Uniform grid of temperatures whose first sample sits at (x0, y0, z)
+
+    temps is indexed [y, x], so rows are y and raveling in C order gives the
+    x-fastest point order of ImageData. Only the origin and spacing are
+    stored, no point coordinates.
+    """
+    ny, nx = temps.shape
+    grid = pv.ImageData(dimensions=(nx, ny, 1), spacing=(spacing, spacing, 1.0), origin=(x0, y0, z))
+    grid["Temperature"] = np.asarray(temps, dtype=np.float32).ravel()
+    return grid
+
+
 class HeatSource:
     def __init__(self, max_temp=1000, sigma=0.2, spot_size=0.5, base_temp=200, thermal_diffusivity=1e-5, grid_size=20):
         self.max_temp = max_temp
@@ -11,43 +28,8 @@ class HeatSource:
         self.time_step = 0.05  # Time between heat spot update
         self.grid_size = grid_size  # Add grid_size parameter
         self.decay_factor = 0.7  # Heat decay factor between layers
+        self.heat_map_mode = "splat"  # Engine used by create_hatch_heat_map
         
-    def create_moving_spot(self, position, z, prev_temps=None, time_elapsed=0, theme="dark"):
-        """Create a moving heat spot at given position"""
-        x0, y0 = position
-        # Create a small grid around the current position
-        grid_size = self.grid_size
-        xi = np.linspace(x0 - self.spot_size, x0 + self.spot_size, grid_size)
-        yi = np.linspace(y0 - self.spot_size, y0 + self.spot_size, grid_size)
-        xx, yy = np.meshgrid(xi, yi)
-        zz = np.full(xx.shape, z)
-
-        # Initialize temperature grid with residual heat from previous layers
-        temp_grid = np.full(xx.shape, self.base_temp)
-        if prev_temps is not None:
-            # Apply decay to previous temperatures
-            residual = (prev_temps - self.base_temp) * self.decay_factor
-            temp_grid = np.maximum(temp_grid, residual + self.base_temp)
-        
-        # Calculate temperature distribution
-        dist = np.sqrt((xx - x0)**2 + (yy - y0)**2)
-        new_heat = self.max_temp * np.exp(-dist**2 / (2 * self.sigma**2))
-        temp_grid = np.maximum(temp_grid, new_heat)
-
-        # Apply thermal diffusion if previous temperatures exist
-        if prev_temps is not None:
-            # Simple diffusion model (would be more complex in real implementation)
-            diffused = prev_temps * np.exp(-self.thermal_diffusivity * time_elapsed)
-            temp_grid = np.maximum(temp_grid, diffused)
-        
-        # Create structured grid
-        grid = pv.StructuredGrid(xx, yy, zz)
-        grid["Temperature"] = temp_grid.flatten(order="F")
-        
-        # Use theme-based colormap
-        cmap = "coolwarm" if theme == "dark" else "hot"
-        return grid, cmap, temp_grid
-
     # Residual heat handling
     def apply_residual_heat(self, base_temp, prev_temps, decay_factor=0.7):
         """Apply residual heat from previous layers"""
@@ -59,61 +41,87 @@ class HeatSource:
         return np.maximum(base_temp, residual + base_temp)
 
     
-    def create_hatch_heat_map(self, hatches, z, hatch_spacing, overall_bounds):
-        """Create heat map visualization for hatches using entire part bounds"""
+    def create_hatch_heat_map(self, hatches, z, hatch_spacing, overall_bounds, mode=None):
+        """Create heat map visualization for hatches using entire part bounds
+
+        mode selects the engine, defaulting to heat_map_mode:
+        "splat" stamps a truncated Gaussian around every hatch point,
+        "line" treats every vector as a line source heating its whole length,
+        "fft" convolves the rasterized scan path with the Gaussian, and
+        "direct" evaluates every point over the whole grid (slow, reference).
+        """
         if not hatches or not overall_bounds:
             return None
             
         minx, miny, _ = overall_bounds['min']
         maxx, maxy, _ = overall_bounds['max']
         
-        # Create grid covering entire part with fixed resolution
+        # Axes of a grid covering entire part with fixed resolution
         resolution = 0.1  # Fixed resolution for consistent visualization
-        xi = np.arange(minx, maxx, resolution)
-        yi = np.arange(miny, maxy, resolution)
-        xx, yy = np.meshgrid(xi, yi)
-        zz = np.full(xx.shape, z)
+        xi = np.arange(minx, maxx, resolution, dtype=np.float32)
+        yi = np.arange(miny, maxy, resolution, dtype=np.float32)
+        if not len(xi) or not len(yi):
+            return None
+        origin = (float(xi[0]), float(yi[0]))
         
-        # Initialize temperature grid with base temperature
-        base_temp = 100
-        temp_grid = np.full(xx.shape, base_temp)
+        base_temp = 100  # Heat maps start from this temperature
+        points = np.concatenate(hatches)
+        offsets = np.concatenate(([0], np.cumsum([len(hatch) for hatch in hatches])))
+        temp_grid = self.hatch_temperatures(points, offsets, origin, (len(yi), len(xi)), resolution,
+                                            mode=mode, base_temp=base_temp)
         
-        # Add temperature contribution from each hatch point
-        for hatch in hatches:
-            for point in hatch:
-                x0, y0 = point
-                dist = np.sqrt((xx - x0)**2 + (yy - y0)**2)
-                temp_contribution = self.max_temp * np.exp(-dist**2 / (2 * self.sigma**2))
-                temp_grid = np.maximum(temp_grid, base_temp + temp_contribution)
+        return heat_image(origin[0], origin[1], z, resolution, temp_grid)
+    
+    def hatch_temperatures(self, points, offsets, origin, shape, resolution, mode=None, base_temp=None):
+        """Return the (ny, nx) float32 heat field of a layer's hatches on a uniform grid
+
+        points and offsets are the layer's hatch points and hatch offsets,
+        origin the (x, y) of cell (0, 0). See create_hatch_heat_map for mode.
+        """
+        mode = mode or self.heat_map_mode
+        base_temp = self.base_temp if base_temp is None else base_temp
+        points = np.asarray(points)
+        temp_grid = np.full(shape, base_temp, dtype=np.float32)
+        if not len(points):
+            return temp_grid
         
-        # Create structured grid
-        grid = pv.StructuredGrid(xx, yy, zz)
-        grid["Temperature"] = temp_grid.flatten(order="F")
-        return grid
+        if mode == "splat":
+            splat_max(temp_grid, points[:, 0], points[:, 1], origin, resolution,
+                      self.sigma, self.max_temp, offset=base_temp)
+        elif mode == "line":
+            splat_segments_max(temp_grid, hatch_segments(points, offsets), origin, resolution,
+                               self.sigma, self.max_temp, offset=base_temp)
+        elif mode == "fft":
+            path, _ = scan_path(points, offsets, 0.0, resolution)
+            heat = splat_fft(shape, path[:, 0], path[:, 1], origin, resolution, self.sigma)
+            temp_grid += self.max_temp * heat
+        elif mode == "direct":
+            # Add temperature contribution from each hatch point. The Gaussian is
+            # separable, so each point is an outer product of two 1D profiles
+            xi = (origin[0] + np.arange(shape[1]) * resolution).astype(np.float32)
+            yi = (origin[1] + np.arange(shape[0]) * resolution).astype(np.float32)
+            for x0, y0 in points:
+                gx = np.exp(-(xi - x0)**2 / (2 * self.sigma**2))
+                gy = np.exp(-(yi - y0)**2 / (2 * self.sigma**2))
+                temp_contribution = self.max_temp * np.outer(gy, gx)
+                np.maximum(temp_grid, base_temp + temp_contribution, out=temp_grid)
+        else:
+            raise ValueError(f"Unknown heat map mode: {mode}")
+        return temp_grid
     
+    def layer_solver(self, bounds):
+        """Return the layer-wide field playback advances along the scan path
+
+        Every heat source provides one with reset(temperatures),
+        advance(positions, dt, speed), temperatures, origin, resolution
+        and shape. The Gaussian source is solved by finite differences.
+        """
+        from .thermal_solver import LayerThermalSolver
+        return LayerThermalSolver(self, bounds)
+
     def _distance_to_segment(self, x, y, p1, p2):
-        """Calculate distance from point (x,y) to line segment (p1-p2)"""
-        # Vector from p1 to p2
-        vx = p2[0] - p1[0]
-        vy = p2[1] - p1[1]
-        
-        # Vector from p1 to point
-        wx = x - p1[0]
-        wy = y - p1[1]
-        
-        # Calculate dot product
-        c1 = wx * vx + wy * vy
-        if c1 <= 0:
-            # Closest to p1
-            return np.sqrt(wx**2 + wy**2)
-            
-        c2 = vx * vx + vy * vy
-        if c2 <= c1:
-            # Closest to p2
-            return np.sqrt((x - p2[0])**2 + (y - p2[1])**2)
-            
-        # Closest to a point along the segment
-        b = c1 / c2
-        pbx = p1[0] + b * vx
-        pby = p1[1] + b * vy
-        return np.sqrt((x - pbx)**2 + (y - pby)**2)
\ No newline at end of file
+        """Calculate distance from point(s) (x,y) to line segment (p1-p2)
+
+        x and y may be arrays, and p1/p2 pairs of arrays, broadcast together.
+        """
+        return distance_to_segment(x, y, p1[0], p1[1], p2[0], p2[1])
@@ -0,0 +1,204 @@
+import numpy as np
+
+KERNEL_RADIUS = 4.0  # Gaussian kernels are truncated at this many sigmas
+SPLAT_CHUNK_CELLS = 1 << 16  # Cells evaluated per vectorized batch, keeps temporaries cache sized
+
+
+def kernel_half_width(sigma: float, resolution: float, radius: float = KERNEL_RADIUS) -> int:
+    """Half width in cells of a Gaussian window truncated at radius sigmas"""
+    return max(int(np.ceil(radius * sigma / resolution)), 0)
+
+
+def gaussian_kernel(sigma: float, resolution: float, radius: float = KERNEL_RADIUS):
+    """(k, k) float32 Gaussian with peak 1 sampled on the grid, truncated at radius sigmas"""
+    half = kernel_half_width(sigma, resolution, radius)
+    d = np.arange(-half, half + 1) * resolution
+    profile = np.exp(-d**2 / (2 * sigma**2))
+    kernel = np.outer(profile, profile)
+    kernel[np.add.outer(d**2, d**2) > (radius * sigma)**2] = 0
+    return kernel.astype(np.float32)
+
+
+def splat_max(temps, xs, ys, origin, resolution: float, sigma: float, amplitude: float,
+              offset: float = 0.0, radius: float = KERNEL_RADIUS):
+    """Raise temps to offset + amplitude * Gaussian around every sample, in place
+
+    temps is a C-contiguous [y, x] grid whose cell (0, 0) is at origin. Each
+    sample only touches the (k, k) window of cells within radius sigmas of
+    its nearest cell. The window offsets are fixed, the weights come from
+    separable 1D profiles at the sample's exact position, so the result
+    equals evaluating every Gaussian over the whole grid and taking the
+    maximum, up to the truncation.
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    ys = np.asarray(ys, dtype=np.float64)
+    ny, nx = temps.shape
+    flat = temps.reshape(-1)
+    half = kernel_half_width(sigma, resolution, radius)
+    window = np.arange(-half, half + 1)
+    k = len(window)
+    cx = np.rint((xs - origin[0]) / resolution).astype(np.int64)
+    cy = np.rint((ys - origin[1]) / resolution).astype(np.int64)
+    # Samples whose window misses the grid entirely
+    near = (cx > -half - 1) & (cx < nx + half) & (cy > -half - 1) & (cy < ny + half)
+    xs, ys, cx, cy = xs[near], ys[near], cx[near], cy[near]
+
+    chunk = max(SPLAT_CHUNK_CELLS // (k * k), 1)
+    for start in range(0, len(xs), chunk):
+        s = slice(start, start + chunk)
+        ix = cx[s, None] + window  # (m, k)
+        iy = cy[s, None] + window
+        gx = np.exp(-(origin[0] + ix * resolution - xs[s, None])**2 / (2 * sigma**2)).astype(np.float32)
+        gy = np.exp(-(origin[1] + iy * resolution - ys[s, None])**2 / (2 * sigma**2)).astype(np.float32)
+        values = offset + amplitude * (gy[:, :, None] * gx[:, None, :])
+        inside = ((iy >= 0) & (iy < ny))[:, :, None] & ((ix >= 0) & (ix < nx))[:, None, :]
+        inside &= values > offset + amplitude * np.exp(-radius**2 / 2)
+        cells = iy[:, :, None] * nx + ix[:, None, :]
+        np.maximum.at(flat, cells[inside], values[inside])
+    return temps
+
+
+def splat_fft(shape, xs, ys, origin, resolution: float, sigma: float, radius: float = KERNEL_RADIUS):
+    """Normalized heat of a densely sampled scan path by FFT convolution
+
+    The samples are rasterized to the nearest cell and convolved with the
+    truncated Gaussian kernel in one FFT. The kernel is scaled so that a
+    long straight path sampled once per cell peaks at 1, and overlapping
+    heat adds up but is clipped at 1. Returns a float32 [y, x] array.
+    """
+    ny, nx = shape
+    kernel = gaussian_kernel(sigma, resolution, radius)
+    half = kernel.shape[0] // 2
+    raster = np.zeros(shape, dtype=np.float32)
+    cx = np.rint((np.asarray(xs) - origin[0]) / resolution).astype(np.int64)
+    cy = np.rint((np.asarray(ys) - origin[1]) / resolution).astype(np.int64)
+    inside = (cx >= 0) & (cx < nx) & (cy >= 0) & (cy < ny)
+    np.add.at(raster, (cy[inside], cx[inside]), 1.0)
+
+    # Zero padding keeps the convolution linear instead of circular
+    fft_shape = (ny + 2 * half, nx + 2 * half)
+    spectrum = np.fft.rfft2(raster, fft_shape) * np.fft.rfft2(kernel, fft_shape)
+    heat = np.fft.irfft2(spectrum, fft_shape)[half:half + ny, half:half + nx]
+    heat /= kernel[half].sum()  # Cross section of a line of unit samples
+    return np.clip(heat, 0.0, 1.0).astype(np.float32)
+
+
+def _segment_distance_sq(wx, wy, vx, vy, inv_length_sq):
+    """Squared distance of offsets (wx, wy) from a segment start to the segment along (vx, vy)
+
+    inv_length_sq is 1 / (vx² + vy²), or 0 for a zero-length segment.
+    """
+    t = np.clip((wx * vx + wy * vy) * inv_length_sq, 0.0, 1.0)
+    dx = wx - t * vx
+    dy = wy - t * vy
+    return dx * dx + dy * dy
+
+
+def _inverse_length_sq(vx, vy):
+    length_sq = vx * vx + vy * vy
+    with np.errstate(divide='ignore'):
+        return np.where(length_sq > 0, 1.0 / length_sq, 0.0)
+
+
+def distance_to_segment(x, y, x1, y1, x2, y2):
+    """Distance from points (x, y) to segments (x1, y1)-(x2, y2), broadcast elementwise
+
+    Zero-length segments give the distance to their single point.
+    """
+    vx = np.subtract(x2, x1)
+    vy = np.subtract(y2, y1)
+    return np.sqrt(_segment_distance_sq(np.subtract(x, x1), np.subtract(y, y1), vx, vy, _inverse_length_sq(vx, vy)))
+
+
+def hatch_segments(points, offsets):
+    """(m, 4) x1, y1, x2, y2 of every vector in a layer, single-point hatches as zero-length ones"""
+    points = np.asarray(points, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    counts = np.diff(offsets)
+    if len(points) == 0:
+        return np.empty((0, 4))
+    hatch_of_point = np.repeat(np.arange(len(counts)), counts)
+    starts = np.flatnonzero(hatch_of_point[:-1] == hatch_of_point[1:])
+    singles = offsets[:-1][counts == 1]
+    first = np.concatenate((starts, singles))
+    second = np.concatenate((starts + 1, singles))
+    order = np.argsort(first, kind='stable')
+    return np.column_stack((points[first[order]], points[second[order]]))
+
+
+def split_segments(segments, max_extent: float):
+    """Cut diagonal segments so no piece spans more than max_extent in both x and y
+
+    Axis-aligned segments already have a tight bounding box and stay whole.
+    """
+    extent = np.minimum(np.abs(segments[:, 2] - segments[:, 0]), np.abs(segments[:, 3] - segments[:, 1]))
+    pieces = np.maximum(np.ceil(extent / max_extent), 1).astype(np.int64)
+    if (pieces == 1).all():
+        return segments
+    seg = np.repeat(np.arange(len(segments)), pieces)
+    part = np.arange(len(seg)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    t0 = (part / pieces[seg])[:, None]
+    t1 = ((part + 1) / pieces[seg])[:, None]
+    start, end = segments[seg, :2], segments[seg, 2:]
+    return np.hstack((start + t0 * (end - start), start + t1 * (end - start)))
+
+
+def splat_segments_max(temps, segments, origin, resolution: float, sigma: float, amplitude: float,
+                       offset: float = 0.0, radius: float = KERNEL_RADIUS):
+    """Raise temps to offset + amplitude * Gaussian of the distance to the nearest segment, in place
+
+    A line source: every vector heats the cells around its whole length,
+    not just around its end points. Each segment only visits the cells of
+    its bounding box grown by radius sigmas, and segments are cut into
+    short pieces first so diagonal vectors don't cover a huge box. Cells
+    of all segments are enumerated with index arithmetic in bounded chunks.
+    """
+    segments = np.asarray(segments, dtype=np.float64)
+    ny, nx = temps.shape
+    flat = temps.reshape(-1)
+    if len(segments) == 0:
+        return temps
+    reach = radius * sigma
+    segments = split_segments(segments, max(2 * reach, resolution))
+
+    # Cell window of every piece, clipped to the grid
+    lo_x = np.ceil((np.minimum(segments[:, 0], segments[:, 2]) - reach - origin[0]) / resolution)
+    hi_x = np.floor((np.maximum(segments[:, 0], segments[:, 2]) + reach - origin[0]) / resolution)
+    lo_y = np.ceil((np.minimum(segments[:, 1], segments[:, 3]) - reach - origin[1]) / resolution)
+    hi_y = np.floor((np.maximum(segments[:, 1], segments[:, 3]) + reach - origin[1]) / resolution)
+    lo_x = np.maximum(lo_x, 0).astype(np.int64)
+    lo_y = np.maximum(lo_y, 0).astype(np.int64)
+    width = np.maximum(np.minimum(hi_x, nx - 1).astype(np.int64) - lo_x + 1, 0)
+    height = np.maximum(np.minimum(hi_y, ny - 1).astype(np.int64) - lo_y + 1, 0)
+    n_cells = width * height
+    keep = n_cells > 0
+    segments, lo_x, lo_y, width, n_cells = segments[keep], lo_x[keep], lo_y[keep], width[keep], n_cells[keep]
+
+    # Per-piece start, direction and inverse squared length, relative to the origin
+    x1 = (segments[:, 0] - origin[0]).astype(np.float32)
+    y1 = (segments[:, 1] - origin[1]).astype(np.float32)
+    vx = (segments[:, 2] - segments[:, 0]).astype(np.float32)
+    vy = (segments[:, 3] - segments[:, 1]).astype(np.float32)
+    inv_length_sq = _inverse_length_sq(vx, vy).astype(np.float32)
+
+    scale = np.float32(-1 / (2 * sigma**2))
+    reach_sq = np.float32(reach**2)
+    ends = np.cumsum(n_cells)
+    start = 0
+    while start < len(segments):
+        # As many whole pieces as fit the chunk, at least one
+        stop = max(int(np.searchsorted(ends, ends[start] - n_cells[start] + SPLAT_CHUNK_CELLS, side='right')), start + 1)
+        counts = n_cells[start:stop]
+        seg = np.repeat(np.arange(start, stop), counts)
+        local = np.arange(len(seg)) - np.repeat(np.cumsum(counts) - counts, counts)
+        row, col = np.divmod(local, width[seg])
+        ix = lo_x[seg] + col
+        iy = lo_y[seg] + row
+        dist_sq = _segment_distance_sq(ix.astype(np.float32) * np.float32(resolution) - x1[seg],
+                                       iy.astype(np.float32) * np.float32(resolution) - y1[seg],
+                                       vx[seg], vy[seg], inv_length_sq[seg])
+        inside = dist_sq < reach_sq
+        values = offset + amplitude * np.exp(dist_sq[inside] * scale)
+        np.maximum.at(flat, (iy * nx + ix)[inside], values)
+        start = stop
+    return temps
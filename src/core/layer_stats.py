@@ -0,0 +1,85 @@
+import numpy as np
+
+# One row per layer, filled while the layer is parsed
+LAYER_STATS_DTYPE = np.dtype([
+    ('min_x', np.float64),
+    ('min_y', np.float64),
+    ('max_x', np.float64),
+    ('max_y', np.float64),
+    ('z', np.float64),
+    ('n_points', np.int64),
+    ('n_hatches', np.int64),
+    ('scan_length', np.float64),     # Total length of all hatch vectors (mm)
+    ('mean_spacing', np.float64),    # Mean distance between neighbouring hatches (mm)
+    ('median_spacing', np.float64),
+    ('hatch_angle', np.float64),     # Dominant hatch direction in degrees, [0, 180)
+])
+
+
+def compute_layer_stats(points, offsets, z):
+    """Return a LAYER_STATS_DTYPE record for one layer
+
+    ``points`` is the layer's (n, 2) coordinate array and ``offsets`` the
+    hatch start offsets with a closing end offset. Everything is computed
+    with array operations over the whole layer.
+    """
+    stats = np.zeros((), dtype=LAYER_STATS_DTYPE)
+    points = np.asarray(points, dtype=np.float64)
+    offsets = np.asarray(offsets)
+    counts = np.diff(offsets)
+    stats['z'] = z
+    stats['n_points'] = len(points)
+    stats['n_hatches'] = len(counts)
+    stats['mean_spacing'] = stats['median_spacing'] = stats['hatch_angle'] = np.nan
+
+    if len(points) == 0:
+        for field in ('min_x', 'min_y', 'max_x', 'max_y'):
+            stats[field] = np.nan
+        return stats
+
+    stats['min_x'], stats['min_y'] = points.min(axis=0)
+    stats['max_x'], stats['max_y'] = points.max(axis=0)
+
+    # Vectors between consecutive points, minus the jumps from one hatch to the next
+    deltas = np.diff(points, axis=0)
+    inside = np.ones(len(deltas), dtype=bool)
+    inside[offsets[1:-1][(offsets[1:-1] > 0) & (offsets[1:-1] < len(points))] - 1] = False
+    deltas = deltas[inside]
+    lengths = np.hypot(deltas[:, 0], deltas[:, 1])
+    stats['scan_length'] = lengths.sum()
+
+    # Length weighted mean of doubled angles, so 0 and 180 degrees agree
+    if stats['scan_length'] > 0:
+        doubled = 2 * np.arctan2(deltas[:, 1], deltas[:, 0])
+        angle = 0.5 * np.arctan2((lengths * np.sin(doubled)).sum(), (lengths * np.cos(doubled)).sum())
+    else:
+        angle = 0.0
+    stats['hatch_angle'] = np.degrees(angle) % 180
+
+    # Spacing of hatch start points measured across the dominant direction
+    starts = offsets[:-1][counts > 0]
+    if len(starts) >= 2:
+        normal = np.array([-np.sin(angle), np.cos(angle)])
+        across = np.sort(points[starts] @ normal)
+        diffs = np.diff(across)
+        stats['mean_spacing'] = diffs.mean()
+        stats['median_spacing'] = np.median(diffs)
+    return stats
+
+
+def stats_for_store(store):
+    """Compute the statistics table of every layer in a store"""
+    table = np.zeros(len(store), dtype=LAYER_STATS_DTYPE)
+    for layer in store:
+        table[layer.index] = compute_layer_stats(layer.points, layer.offsets, layer.z)
+    return table
+
+
+def bounds_from_stats(stats):
+    """Reduce a statistics table to overall (min_xyz, max_xyz), or None if there are no points"""
+    stats = stats[stats['n_points'] > 0]
+    if len(stats) == 0:
+        return None
+    min_coords = np.array([stats['min_x'].min(), stats['min_y'].min(), stats['z'].min()])
+    max_coords = np.array([stats['max_x'].max(), stats['max_y'].max(), stats['z'].max()])
+    return min_coords, max_coords
@@ -0,0 +1,242 @@
+import numpy as np
+
+from .layer_stats import LAYER_STATS_DTYPE, bounds_from_stats, compute_layer_stats, stats_for_store
+
+COORD_DTYPE = np.float32
+OFFSET_DTYPE = np.int64
+
+
+def _grow(array, needed):
+    """Return array with room for at least `needed` rows, doubling capacity"""
+    if needed <= len(array):
+        return array
+    capacity = max(needed, 2 * len(array))
+    grown = np.empty((capacity,) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class LayerView:
+    """Thin per-layer view into a LayerStore, no geometry is copied"""
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    @property
+    def layer_number(self):
+        return int(self.store.layer_numbers[self.index])
+
+    @property
+    def z(self):
+        return float(self.store.z[self.index])
+
+    @property
+    def n_hatches(self):
+        layer_offsets = self.store.layer_offsets
+        return int(layer_offsets[self.index + 1] - layer_offsets[self.index])
+
+    @property
+    def n_points(self):
+        start, stop = self.store.layer_point_range(self.index)
+        return stop - start
+
+    @property
+    def points(self):
+        """(n, 2) float32 coordinates of every hatch point in this layer"""
+        start, stop = self.store.layer_point_range(self.index)
+        return self.store.coords[start:stop]
+
+    @property
+    def offsets(self):
+        """Hatch start offsets into `points`, with a closing end offset"""
+        layer_offsets = self.store.layer_offsets
+        hatch_offsets = self.store.hatch_offsets[layer_offsets[self.index]:layer_offsets[self.index + 1] + 1]
+        return hatch_offsets - hatch_offsets[0]
+
+    @property
+    def hatches(self):
+        """List of (k, 2) zero-copy slices, one per hatch"""
+        points = self.points
+        offsets = self.offsets
+        return [points[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+
+    def points3d(self):
+        """Return (n, 3) float32 points with this layer's z as third column"""
+        points = self.points
+        out = np.empty((len(points), 3), dtype=COORD_DTYPE)
+        out[:, :2] = points
+        out[:, 2] = self.z
+        return out
+
+    @property
+    def stats(self):
+        """This layer's row of the store's statistics table"""
+        return self.store.stats[self.index]
+
+    @property
+    def nbytes(self):
+        return self.points.nbytes + self.offsets.nbytes
+
+    def __repr__(self):
+        return f"LayerView(index={self.index}, layer_number={self.layer_number}, hatches={self.n_hatches})"
+
+
+class LayerStore:
+    """Columnar storage for all layers of a part
+
+    Every hatch point of the part lives in one contiguous float32 (n, 2)
+    buffer. `hatch_offsets` holds the start of every hatch in that buffer
+    and `layer_offsets` the first hatch of every layer, each with a closing
+    end offset, so a layer or a hatch is always a plain slice.
+    """
+
+    def __init__(self, point_capacity=1 << 16, hatch_capacity=1 << 12, layer_capacity=256):
+        self._coords = np.empty((point_capacity, 2), dtype=COORD_DTYPE)
+        self._hatch_offsets = np.zeros(hatch_capacity + 1, dtype=OFFSET_DTYPE)
+        self._layer_offsets = np.zeros(layer_capacity + 1, dtype=OFFSET_DTYPE)
+        self._z = np.empty(layer_capacity, dtype=np.float64)
+        self._layer_numbers = np.empty(layer_capacity, dtype=np.int64)
+        self._stats = np.zeros(layer_capacity, dtype=LAYER_STATS_DTYPE)
+        self.n_points = 0
+        self.n_hatches = 0
+        self.n_layers = 0
+
+    @classmethod
+    def from_arrays(cls, coords, hatch_offsets, layer_offsets, z, layer_numbers, stats=None):
+        """Wrap existing arrays (e.g. memory-mapped) without copying them
+
+        The statistics table is computed on first use if not given.
+        """
+        store = cls.__new__(cls)
+        store._coords = coords
+        store._hatch_offsets = hatch_offsets
+        store._layer_offsets = layer_offsets
+        store._z = z
+        store._layer_numbers = layer_numbers
+        store._stats = stats
+        store.n_points = len(coords)
+        store.n_hatches = len(hatch_offsets) - 1
+        store.n_layers = len(z)
+        return store
+
+    @classmethod
+    def concatenate(cls, stores):
+        """Join stores end to end into a new store, keeping layer order"""
+        stores = list(stores)
+        point_starts = np.cumsum([0] + [store.n_points for store in stores])
+        hatch_starts = np.cumsum([0] + [store.n_hatches for store in stores])
+        hatch_offsets = [np.zeros(1, dtype=OFFSET_DTYPE)]
+        layer_offsets = [np.zeros(1, dtype=OFFSET_DTYPE)]
+        for store, point_start, hatch_start in zip(stores, point_starts, hatch_starts):
+            hatch_offsets.append(store.hatch_offsets[1:] + point_start)
+            layer_offsets.append(store.layer_offsets[1:] + hatch_start)
+        return cls.from_arrays(
+            np.concatenate([store.coords for store in stores] or [np.empty((0, 2), dtype=COORD_DTYPE)]),
+            np.concatenate(hatch_offsets),
+            np.concatenate(layer_offsets),
+            np.concatenate([store.z for store in stores] or [np.empty(0)]),
+            np.concatenate([store.layer_numbers for store in stores] or [np.empty(0, dtype=np.int64)]),
+            np.concatenate([store.stats for store in stores] or [np.empty(0, dtype=LAYER_STATS_DTYPE)]),
+        )
+
+    # Trimmed views of the backing buffers
+    @property
+    def coords(self):
+        return self._coords[:self.n_points]
+
+    @property
+    def hatch_offsets(self):
+        return self._hatch_offsets[:self.n_hatches + 1]
+
+    @property
+    def layer_offsets(self):
+        return self._layer_offsets[:self.n_layers + 1]
+
+    @property
+    def z(self):
+        return self._z[:self.n_layers]
+
+    @property
+    def layer_numbers(self):
+        return self._layer_numbers[:self.n_layers]
+
+    @property
+    def stats(self):
+        """Per-layer statistics table (see layer_stats.LAYER_STATS_DTYPE)"""
+        if self._stats is None:
+            self._stats = stats_for_store(self)
+        return self._stats[:self.n_layers]
+
+    @property
+    def nbytes(self):
+        return (self.coords.nbytes + self.hatch_offsets.nbytes + self.layer_offsets.nbytes
+                + self.z.nbytes + self.layer_numbers.nbytes + self.stats.nbytes)
+
+    def layer_point_range(self, index):
+        """Return (start, stop) of a layer's points in `coords`"""
+        first_hatch = self._layer_offsets[index]
+        last_hatch = self._layer_offsets[index + 1]
+        return int(self._hatch_offsets[first_hatch]), int(self._hatch_offsets[last_hatch])
+
+    def append_layer(self, layer_number, z, coords, counts):
+        """Append one layer from flat x, y coordinates and per-hatch point counts"""
+        points = np.asarray(coords, dtype=COORD_DTYPE).reshape(-1, 2)
+        counts = np.asarray(counts, dtype=OFFSET_DTYPE)
+
+        n_points = self.n_points + len(points)
+        n_hatches = self.n_hatches + len(counts)
+        n_layers = self.n_layers + 1
+        self._coords = _grow(self._coords, n_points)
+        self._hatch_offsets = _grow(self._hatch_offsets, n_hatches + 1)
+        self._layer_offsets = _grow(self._layer_offsets, n_layers + 1)
+        self._z = _grow(self._z, n_layers)
+        self._layer_numbers = _grow(self._layer_numbers, n_layers)
+        if self._stats is None:
+            self._stats = stats_for_store(self)
+        self._stats = _grow(self._stats, n_layers)
+
+        self._coords[self.n_points:n_points] = points
+        np.cumsum(counts, out=self._hatch_offsets[self.n_hatches + 1:n_hatches + 1])
+        self._hatch_offsets[self.n_hatches + 1:n_hatches + 1] += self.n_points
+        self._layer_offsets[n_layers] = n_hatches
+        self._z[self.n_layers] = z
+        self._layer_numbers[self.n_layers] = layer_number
+        # Statistics come from the same pass, while the layer is at hand
+        local_offsets = np.concatenate(([0], np.cumsum(counts)))
+        self._stats[self.n_layers] = compute_layer_stats(points, local_offsets, z)
+
+        self.n_points = n_points
+        self.n_hatches = n_hatches
+        self.n_layers = n_layers
+        return LayerView(self, self.n_layers - 1)
+
+    def compact(self):
+        """Release the spare capacity left over from appending"""
+        if len(self._coords) == self.n_points and len(self._z) == self.n_layers:
+            return  # Already tight, e.g. memory-mapped arrays from the cache
+        self._coords = self.coords.copy()
+        self._hatch_offsets = self.hatch_offsets.copy()
+        self._layer_offsets = self.layer_offsets.copy()
+        self._z = self.z.copy()
+        self._layer_numbers = self.layer_numbers.copy()
+        self._stats = self.stats.copy()
+
+    def bounds(self):
+        """Return (min_xyz, max_xyz) over all points, or None if empty"""
+        return bounds_from_stats(self.stats)
+
+    def __len__(self):
+        return self.n_layers
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.n_layers
+        if not 0 <= index < self.n_layers:
+            raise IndexError("layer index out of range")
+        return LayerView(self, index)
+
+    def __iter__(self):
+        for index in range(self.n_layers):
+            yield LayerView(self, index)
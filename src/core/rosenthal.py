@@ -0,0 +1,202 @@
+import numpy as np
+
+from .heat_model import HeatSource
+from .heat_splat import SPLAT_CHUNK_CELLS
+from .scan_path import SCAN_SPEED, scan_path
+from .thermal_solver import SOLVER_RESOLUTION
+
+CUTOFF_RADIUS = 2.0  # mm around each source position where the solution is evaluated
+
+
+def rosenthal_max(temps, sources, velocities, origin, resolution: float, strength: float, diffusivity: float,
+                  base_temp: float, max_temp: float, cutoff: float = CUTOFF_RADIUS):
+    """Raise temps to the Rosenthal moving point source solution of every source, in place
+
+    Quasi-steady temperature on the surface of a semi-infinite body around
+    a point source moving at constant velocity:
+
+        T = base_temp + strength / R * exp(-|v| (xi + R) / (2 * diffusivity))
+
+    with R the distance to the source and xi the distance ahead of it
+    along v. strength is absorbed power / (2 pi conductivity). The
+    singularity at the source is clipped at max_temp.
+
+    sources and velocities are (m, 2) arrays in mm and mm/s. Each source
+    only touches the cells within cutoff of it, evaluated for many sources
+    at once in bounded chunks, and every cell keeps the maximum.
+    """
+    sources = np.asarray(sources, dtype=np.float64).reshape(-1, 2)
+    velocities = np.broadcast_to(np.asarray(velocities, dtype=np.float64), sources.shape)
+    ny, nx = temps.shape
+    flat = temps.reshape(-1)
+    half = int(np.ceil(cutoff / resolution))
+    window = np.arange(-half, half + 1)
+    k = len(window)
+    speed = np.hypot(velocities[:, 0], velocities[:, 1])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        direction = np.nan_to_num(velocities / speed[:, None])
+    decay = speed / (2 * diffusivity)  # 1/mm
+    min_distance = resolution / 2  # Keeps the source cell finite before clipping
+
+    cx = np.rint((sources[:, 0] - origin[0]) / resolution).astype(np.int64)
+    cy = np.rint((sources[:, 1] - origin[1]) / resolution).astype(np.int64)
+    chunk = max(SPLAT_CHUNK_CELLS // (k * k), 1)
+    for start in range(0, len(sources), chunk):
+        s = slice(start, start + chunk)
+        ix = cx[s, None] + window  # (m, k)
+        iy = cy[s, None] + window
+        dx = (origin[0] + ix * resolution - sources[s, 0, None])[:, None, :]  # (m, 1, k)
+        dy = (origin[1] + iy * resolution - sources[s, 1, None])[:, :, None]  # (m, k, 1)
+        distance = np.sqrt(dx * dx + dy * dy)
+        xi = dx * direction[s, 0, None, None] + dy * direction[s, 1, None, None]
+        np.maximum(distance, min_distance, out=distance)
+        rise = strength / distance * np.exp(-decay[s, None, None] * (xi + distance))
+        values = np.minimum(base_temp + rise, max_temp).astype(np.float32)
+        inside = ((iy >= 0) & (iy < ny))[:, :, None] & ((ix >= 0) & (ix < nx))[:, None, :]
+        inside &= distance <= cutoff
+        cells = iy[:, :, None] * nx + ix[:, None, :]
+        np.maximum.at(flat, cells[inside], values[inside])
+    return temps
+
+
+def path_velocities(path, arc, speed: float):
+    """(n, 2) velocity of the laser at each scan path sample, moving at speed along the hatches
+
+    Samples take the direction of the vector they are on. Hatch end points
+    keep the direction they arrived with, samples at a hatch start take
+    the direction they leave with.
+    """
+    n = len(path)
+    steps = np.diff(path[:, :2], axis=0)
+    lengths = np.diff(arc)
+    along = lengths > 0
+    jumps = ~along & np.any(steps != 0, axis=1)  # Moves to the next hatch
+    velocities = np.zeros((n, 2))
+    velocities[:-1][along] = steps[along] / lengths[along, None] * speed
+
+    moving = np.zeros(n, dtype=bool)
+    moving[:-1] = along
+    index = np.arange(n)
+    last = np.maximum.accumulate(np.where(moving, index, -1))
+    following = np.minimum.accumulate(np.where(moving, index, n)[::-1])[::-1]
+    hatch = np.concatenate(([0], np.cumsum(jumps)))  # Hatch each sample belongs to
+    # Prefer the next moving sample of the same hatch, else the last one
+    same_hatch = following < n
+    same_hatch[same_hatch] &= hatch[following[same_hatch]] == hatch[same_hatch]
+    source = np.where(same_hatch, following, last)
+    valid = ~moving & (source >= 0) & (source < n)
+    velocities[valid] = velocities[source[valid]]
+    return velocities
+
+
+class RosenthalSource(HeatSource):
+    """Rosenthal's analytical moving point source, usable wherever a HeatSource is
+
+    Layer heat maps are the peak temperature every cell reaches while the
+    source moves along the scan path at scan_speed. During playback the
+    field is the quasi-steady solution around the laser's current position.
+    ``max_temp`` clips the temperature at the source, ``thermal_diffusivity``
+    is in m²/s and ``conductivity`` in W/(mm K).
+    """
+
+    def __init__(self, power=200.0, absorptivity=0.4, conductivity=0.0164, scan_speed=SCAN_SPEED,
+                 cutoff_radius=CUTOFF_RADIUS, thermal_diffusivity=4.1e-6, **kwargs):
+        super().__init__(thermal_diffusivity=thermal_diffusivity, **kwargs)
+        self.power = power  # W
+        self.absorptivity = absorptivity
+        self.conductivity = conductivity
+        self.scan_speed = scan_speed  # mm/s
+        self.cutoff_radius = cutoff_radius  # mm
+
+    @property
+    def strength(self):
+        """Absorbed power over 2 pi conductivity, K mm"""
+        return self.absorptivity * self.power / (2 * np.pi * self.conductivity)
+
+    @property
+    def diffusivity(self):
+        """Thermal diffusivity in mm²/s"""
+        return self.thermal_diffusivity * 1e6
+
+    def field_at(self, temps, sources, velocities, origin, resolution, base_temp=None):
+        """Raise temps (in place) to the solution around every source position"""
+        base_temp = self.base_temp if base_temp is None else base_temp
+        return rosenthal_max(temps, sources, velocities, origin, resolution, self.strength, self.diffusivity,
+                             base_temp, base_temp + self.max_temp, self.cutoff_radius)
+
+    def hatch_temperatures(self, points, offsets, origin, shape, resolution, mode=None, base_temp=None):
+        """Peak temperatures of a layer scanned along its hatches; mode is not used"""
+        base_temp = self.base_temp if base_temp is None else base_temp
+        temp_grid = np.full(shape, base_temp, dtype=np.float32)
+        if not len(points):
+            return temp_grid
+        path, arc = scan_path(points, offsets, 0.0, resolution)
+        if not len(path):
+            return temp_grid
+        velocities = path_velocities(path, arc, self.scan_speed)
+        return self.field_at(temp_grid, path[:, :2], velocities, origin, resolution, base_temp)
+
+    def layer_solver(self, bounds):
+        return RosenthalLayerField(self, bounds)
+
+
+class RosenthalLayerField:
+    """Layer-wide field following the laser with the Rosenthal solution
+
+    Same interface as LayerThermalSolver, so playback can drive either,
+    on the same default grid. Each advance shows the quasi-steady solution
+    around the last position on top of the field the layer started from,
+    so only the cells within the cutoff radius of two positions change.
+    """
+
+    def __init__(self, source: RosenthalSource, bounds, resolution: float = None):
+        self.source = source
+        self.resolution = resolution or SOLVER_RESOLUTION
+        min_coords, max_coords = bounds
+        margin = source.cutoff_radius
+        self.origin = (min_coords[0] - margin, min_coords[1] - margin)
+        self.shape = (int(np.ceil((max_coords[1] - min_coords[1] + 2 * margin) / self.resolution)) + 1,
+                      int(np.ceil((max_coords[0] - min_coords[0] + 2 * margin) / self.resolution)) + 1)
+        self.temperatures = np.full(self.shape, source.base_temp, dtype=np.float32)
+        self._start = self.temperatures.copy()
+        self._window = None  # Cells written by the last advance
+        self._direction = np.array([1.0, 0.0])
+        self._last_position = None
+        self.time = 0.0
+
+    def reset(self, temperatures=None):
+        """Start from base temperature, or from a given (ny, nx) field"""
+        if temperatures is None:
+            self._start.fill(self.source.base_temp)
+        else:
+            self._start[:] = temperatures
+        self.temperatures[:] = self._start
+        self._window = None
+        self._last_position = None
+        self.time = 0.0
+
+    def advance(self, positions, dt: float, speed: float = None):
+        """Move the source to the last of positions, which it reached at speed mm/s"""
+        self.time += max(dt, 0.0)
+        positions = np.asarray(positions, dtype=np.float64)
+        if not len(positions):
+            return
+        position = positions[-1, :2]
+        previous = positions[-2, :2] if len(positions) > 1 else self._last_position
+        if previous is not None:
+            step = position - previous
+            length = np.hypot(*step)
+            if length > 0:
+                self._direction = step / length
+        self._last_position = position
+
+        # Restore the cells of the previous frame, then draw around the new position
+        if self._window is not None:
+            self.temperatures[self._window] = self._start[self._window]
+        half = int(np.ceil(self.source.cutoff_radius / self.resolution))
+        row = int(round((position[1] - self.origin[1]) / self.resolution))
+        col = int(round((position[0] - self.origin[0]) / self.resolution))
+        self._window = (slice(max(row - half, 0), max(row + half + 1, 0)),
+                        slice(max(col - half, 0), max(col + half + 1, 0)))
+        velocity = self._direction * (speed if speed is not None else self.source.scan_speed)
+        self.source.field_at(self.temperatures, position, velocity, self.origin, self.resolution)
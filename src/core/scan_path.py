@@ -0,0 +1,56 @@
+import numpy as np
+
+PATH_RESOLUTION = 0.1  # mm between animation samples
+SCAN_SPEED = 100.0  # mm/s the laser moves along the hatches during playback
+
+
+def scan_path(points, offsets, z, resolution: float = PATH_RESOLUTION):
+    """Sample a layer's scan path at a fixed spacing along the hatches
+
+    Returns (path, arc): path is an (n, 3) array of laser positions and arc
+    the scanned length in mm at each of them. Jumps from one hatch to the
+    next add no length, so the laser moves between hatches instantly. Every
+    hatch vertex is part of the path, with evenly spaced samples between.
+    """
+    points = np.asarray(points, dtype=np.float64)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if len(points) < 2:
+        return np.empty((0, 3)), np.empty(0)
+
+    # Segments between consecutive points of the same hatch
+    starts = np.arange(len(points) - 1)
+    hatch_of_point = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    starts = starts[hatch_of_point[:-1] == hatch_of_point[1:]]
+    if len(starts) == 0:
+        return np.empty((0, 3)), np.empty(0)
+    vectors = points[starts + 1] - points[starts]
+    lengths = np.hypot(vectors[:, 0], vectors[:, 1])
+    segment_arc = np.concatenate(([0.0], np.cumsum(lengths)))  # Arc length at each segment start, plus total
+
+    # Even samples along the whole scan, placed on their segment
+    samples = np.arange(0.0, segment_arc[-1], resolution)
+    segment = np.searchsorted(segment_arc, samples, side='right') - 1
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = np.nan_to_num((samples - segment_arc[segment]) / lengths[segment])
+    sampled = points[starts[segment]] + t[:, None] * vectors[segment]
+
+    # Segment end points and hatch start points, so every vertex is scanned
+    ends = points[starts + 1]
+    end_arc = segment_arc[1:]
+    first = np.concatenate(([True], starts[1:] != starts[:-1] + 1))
+    hatch_starts = points[starts[first]]
+    hatch_start_arc = segment_arc[:-1][first]
+
+    # On ties a hatch end comes before the next hatch's start and samples
+    arc = np.concatenate((end_arc, hatch_start_arc, samples))
+    xy = np.concatenate((ends, hatch_starts, sampled))
+    order = np.argsort(arc, kind='stable')
+    path = np.empty((len(arc), 3))
+    path[:, :2] = xy[order]
+    path[:, 2] = z
+    return path, arc[order]
+
+
+def path_index_at(arc, scanned_length: float) -> int:
+    """Index of the last path sample reached after scanning scanned_length mm"""
+    return max(int(np.searchsorted(arc, scanned_length, side='right')) - 1, 0)
@@ -0,0 +1,231 @@
+import json
+import os
+
+import numpy as np
+
+RESIDENT_LAYERS = 32  # Recent layers kept in memory while heat conducts between them
+HISTORY_RESOLUTION = 0.25  # mm per cell of the history volume
+VERTICAL_CONDUCTION = 0.2  # Fraction of the temperature difference exchanged with each neighbour layer, at most 0.5
+VOLUME_FILE = "volume.npy"
+META_FILE = "meta.json"
+
+
+class ThermalHistory:
+    """Temperature history of a build as a (layer, y, x) volume on disk
+
+    ``volume[k]`` is the temperature field of layer k right after it was
+    scanned, including heat left over from the layers below. The volume
+    is a ``.npy`` file read through ``np.memmap``, so it can hold thousands
+    of layers while only the pages being read are mapped. New layers are
+    written to the file directly rather than through the map, so written
+    layers don't accumulate as dirty pages of this process. Layers are
+    added bottom-up with ``add_layer``.
+
+    The current temperatures of the last ``resident_layers`` layers are
+    kept in memory in a ring buffer. Before each new layer they decay
+    towards ``base_temp`` by ``decay_factor`` and exchange heat with their
+    neighbours below and above (explicit 1D conduction with coefficient
+    ``conduction``). The part below the window counts as cold, at
+    ``base_temp``.
+    """
+
+    def __init__(self, directory: str, volume, meta: dict, resident_layers: int = RESIDENT_LAYERS):
+        self.directory = directory
+        self.volume = volume
+        self.origin = tuple(meta['origin'])
+        self.resolution = meta['resolution']
+        self.base_temp = meta['base_temp']
+        self.decay_factor = meta['decay_factor']
+        self.conduction = meta['conduction']
+        self.n_computed = meta['n_computed']  # Layers 0..n_computed-1 are written
+        self.resident_layers = resident_layers
+        self._meta = meta
+        self._file = None if volume.mode == 'r' else open(volume.filename, 'r+b')
+        # Ring buffer of resident layer temperatures, allocated on first use
+        self._resident = None
+        self._flow = None
+        self._first = 0  # Slot of the oldest resident layer
+        self._count = 0
+        self._last_layer = None
+
+    @classmethod
+    def create(cls, directory: str, n_layers: int, shape, origin, resolution: float, base_temp: float,
+               decay_factor: float, conduction: float = VERTICAL_CONDUCTION,
+               resident_layers: int = RESIDENT_LAYERS):
+        """Create an empty history for n_layers layers of (ny, nx) cells in directory"""
+        if not 0 <= conduction <= 0.5:
+            raise ValueError("conduction must be between 0 and 0.5 to stay stable")
+        os.makedirs(directory, exist_ok=True)
+        volume = np.lib.format.open_memmap(
+            os.path.join(directory, VOLUME_FILE), mode='w+', dtype=np.float32, shape=(n_layers,) + tuple(shape)
+        )
+        meta = {
+            'origin': [float(v) for v in origin],
+            'resolution': float(resolution),
+            'base_temp': float(base_temp),
+            'decay_factor': float(decay_factor),
+            'conduction': float(conduction),
+            'n_computed': 0,
+        }
+        history = cls(directory, volume, meta, resident_layers)
+        history._write_meta()
+        return history
+
+    @classmethod
+    def open(cls, directory: str, mode: str = 'r'):
+        """Open a history written earlier, read-only unless mode is 'r+'"""
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+        volume = np.load(os.path.join(directory, VOLUME_FILE), mmap_mode=mode)
+        return cls(directory, volume, meta)
+
+    @property
+    def shape(self):
+        """(ny, nx) cells of one layer"""
+        return self.volume.shape[1:]
+
+    def __len__(self):
+        return self.volume.shape[0]
+
+    def __getitem__(self, key):
+        """Slice the (layer, y, x) volume, e.g. history[k] or history[:, row, :]"""
+        return self.volume[key]
+
+    def layer(self, index: int):
+        """(ny, nx) temperatures of one layer, memory-mapped"""
+        return self.volume[index]
+
+    def cell_of(self, x, y):
+        """(row, col) of the cell nearest to (x, y)"""
+        return (int(round((y - self.origin[1]) / self.resolution)),
+                int(round((x - self.origin[0]) / self.resolution)))
+
+    def cross_section(self, axis: str, position: float, layers=slice(None)):
+        """(n_layers, n) temperatures of the vertical plane x = position or y = position"""
+        row, col = self.cell_of(position, position)
+        if axis == 'x':
+            return self.volume[layers, :, min(max(col, 0), self.shape[1] - 1)]
+        if axis == 'y':
+            return self.volume[layers, min(max(row, 0), self.shape[0] - 1), :]
+        raise ValueError(f"axis must be 'x' or 'y', not {axis!r}")
+
+    def _slots(self):
+        """Ring buffer slots of the resident layers, oldest first"""
+        return [(self._first + i) % self.resident_layers for i in range(self._count)]
+
+    def start_field(self, index: int):
+        """Temperatures layer index starts from: the decayed heat of the layer below
+
+        Returns a new (ny, nx) array, at base temperature when the layer
+        below is not resident (the first layer, or a jump in the sequence).
+        """
+        field = np.full(self.shape, self.base_temp, dtype=np.float32)
+        if self._last_layer is not None and index == self._last_layer + 1 and self._count:
+            np.subtract(self._resident[self._slots()[-1]], self.base_temp, out=field)
+            field *= self.decay_factor
+            field += self.base_temp
+        return field
+
+    def add_layer(self, index: int, temperatures):
+        """Record a scanned layer and let the resident layers below cool and conduct"""
+        if self._resident is None:
+            self._resident = np.empty((self.resident_layers,) + self.shape, dtype=np.float32)
+            self._flow = np.empty_like(self._resident)
+        if self._last_layer is None or index != self._last_layer + 1:
+            # Not stacked on the previous layer, start a fresh column
+            self._first, self._count = 0, 0
+        self._cool_resident()
+
+        if self._count < self.resident_layers:
+            slot = (self._first + self._count) % self.resident_layers
+            self._count += 1
+        else:
+            # The oldest layer leaves the window
+            slot = self._first
+            self._first = (self._first + 1) % self.resident_layers
+        self._resident[slot] = temperatures
+        layer_bytes = self._resident[slot].nbytes
+        self._file.seek(self.volume.offset + index * layer_bytes)
+        self._file.write(self._resident[slot])
+        self._file.flush()  # Visible through the map right away
+        self._last_layer = index
+        self.n_computed = max(self.n_computed, index + 1)
+
+    def _cool_resident(self):
+        """Decay and vertical conduction of the resident layers, in place"""
+        slots = self._slots()
+        states, flow = self._resident, self._flow
+        for slot in slots:
+            states[slot] -= self.base_temp
+            states[slot] *= self.decay_factor
+        if self.conduction:
+            # Heat flowing down out of every layer; the part under the window
+            # is at base temperature (0 here) and the top layer is insulated
+            for i, slot in enumerate(slots):
+                if i == 0:
+                    np.multiply(states[slot], self.conduction, out=flow[i])
+                else:
+                    np.subtract(states[slot], states[slots[i - 1]], out=flow[i])
+                    flow[i] *= self.conduction
+            for i, slot in enumerate(slots):
+                states[slot] -= flow[i]
+                if i + 1 < len(slots):
+                    states[slot] += flow[i + 1]
+        for slot in slots:
+            states[slot] += self.base_temp
+
+    def flush(self):
+        """Write the metadata, recording how many layers are computed"""
+        self._write_meta()
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._resident = self._flow = None
+        self._count = 0
+        self.volume = None
+
+    def _write_meta(self):
+        if self.volume.mode == 'r':
+            return
+        self._meta['n_computed'] = self.n_computed
+        path = os.path.join(self.directory, META_FILE)
+        with open(f"{path}.tmp", 'w') as f:
+            json.dump(self._meta, f)
+        os.replace(f"{path}.tmp", path)
+
+
+def compute_thermal_history(layers, heat_source, directory: str, resolution: float = HISTORY_RESOLUTION,
+                            resident_layers: int = RESIDENT_LAYERS, conduction: float = VERTICAL_CONDUCTION,
+                            mode=None, progress=None):
+    """Compute the thermal history of every layer into directory and return it
+
+    Each layer's heat field comes from heat_source.hatch_temperatures and
+    is combined with the decayed heat of the layer below by taking the
+    maximum, as the live heat spot does. progress(index, n_layers) is
+    called after every layer.
+    """
+    bounds = layers.bounds()
+    if bounds is None:
+        raise ValueError("No hatches to compute a thermal history for")
+    min_coords, max_coords = bounds
+    reach = 4 * heat_source.sigma
+    origin = (min_coords[0] - reach, min_coords[1] - reach)
+    shape = (int(np.ceil((max_coords[1] - min_coords[1] + 2 * reach) / resolution)) + 1,
+             int(np.ceil((max_coords[0] - min_coords[0] + 2 * reach) / resolution)) + 1)
+    history = ThermalHistory.create(
+        directory, len(layers), shape, origin, resolution, heat_source.base_temp,
+        heat_source.decay_factor, conduction, resident_layers
+    )
+    for index in range(len(layers)):
+        layer = layers[index]
+        field = history.start_field(index)
+        heat = heat_source.hatch_temperatures(layer.points, layer.offsets, origin, shape, resolution, mode=mode)
+        np.maximum(field, heat, out=field)
+        history.add_layer(index, field)
+        if progress is not None:
+            progress(index, len(layers))
+    history.flush()
+    return history
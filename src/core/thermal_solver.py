@@ -0,0 +1,192 @@
+import numpy as np
+
+from .heat_splat import KERNEL_RADIUS, kernel_half_width
+from .scan_path import SCAN_SPEED
+
+STABILITY_SAFETY = 0.9  # Fraction of the explicit stability limit used as sub-step
+SUBSTRATE_COOLING = 20.0  # 1/s, rate at which a layer loses heat to the part below
+ACTIVE_THRESHOLD = 0.5  # K above base temperature that counts as hot, bounds the updated window
+MAX_SUBSTEPS = 2000  # Sub-steps per advance() call, beyond this conduction time is shortened
+RESOLUTION_PER_SIGMA = 0.75  # Cell size in source sigmas the Gaussian is resolved with
+SOLVER_RESOLUTION = 0.15  # mm per cell by default, coarse enough for real-time playback on a CPU
+
+
+class LayerThermalSolver:
+    """Explicit finite-difference heat conduction on a fixed layer-wide grid
+
+    Temperatures live on a uniform [y, x] float32 grid covering the part
+    bounds plus the source's reach, with a one-cell border held at
+    ``base_temp``. Each sub-step applies the 5-point Laplacian stencil,
+    Newton cooling into the substrate at ``cooling_rate`` and the moving
+    Gaussian source, all in place on preallocated buffers. Only the window
+    around hot cells and the source is updated; everything outside it is
+    within ``ACTIVE_THRESHOLD`` of the base temperature.
+
+    The source parameters come from a HeatSource: ``thermal_diffusivity``
+    is read in m²/s, and the source strength is chosen so a hatch scanned
+    at ``reference_speed`` is raised by about ``max_temp - base_temp``
+    before conduction spreads it. The grid resolution doesn't follow the
+    source: a source narrower than the cells can resolve is widened to
+    ``resolution / RESOLUTION_PER_SIGMA``, since the explicit time step
+    shrinks with the square of the cell size.
+    """
+
+    def __init__(self, heat_source, bounds, resolution: float = None,
+                 cooling_rate: float = SUBSTRATE_COOLING, reference_speed: float = SCAN_SPEED):
+        self.base_temp = float(heat_source.base_temp)
+        self.diffusivity = heat_source.thermal_diffusivity * 1e6  # mm²/s
+        self.cooling_rate = cooling_rate
+        self.resolution = resolution or SOLVER_RESOLUTION
+        h = self.resolution
+        self.sigma = max(heat_source.sigma, h / RESOLUTION_PER_SIGMA)
+        # Temperature rise per second at the source centre
+        self.source_rate = (heat_source.max_temp - self.base_temp) * reference_speed / (self.sigma * np.sqrt(2 * np.pi))
+        self.max_dt = STABILITY_SAFETY * h * h / (4 * self.diffusivity + self.cooling_rate * h * h)
+
+        self.half = kernel_half_width(self.sigma, h, KERNEL_RADIUS)
+        min_coords, max_coords = bounds
+        reach = self.half * h
+        self.origin = (min_coords[0] - reach, min_coords[1] - reach)
+        nx = int(np.ceil((max_coords[0] - min_coords[0] + 2 * reach) / h)) + 1
+        ny = int(np.ceil((max_coords[1] - min_coords[1] + 2 * reach) / h)) + 1
+        self.shape = (ny, nx)
+
+        # Buffers with a one-cell border, the interior is the temperature grid
+        self._temps = np.full((ny + 2, nx + 2), self.base_temp, dtype=np.float32)
+        self._scratch = np.empty_like(self._temps)
+        self._kernel = np.empty((2 * self.half + 1, 2 * self.half + 1), dtype=np.float32)
+        self._axis = np.arange(-self.half, self.half + 1) * h  # Kernel cell offsets in mm
+        self._gx = np.empty(2 * self.half + 1)
+        self._gy = np.empty(2 * self.half + 1)
+        self._window = (ny, 0, nx, 0)  # Active interior cells [y0, y1) x [x0, x1), empty
+        self.time = 0.0
+
+    @property
+    def temperatures(self):
+        """(ny, nx) float32 view of the current temperatures"""
+        return self._temps[1:-1, 1:-1]
+
+    def reset(self, temperatures=None):
+        """Return to base temperature, or start from a given (ny, nx) field"""
+        self._temps.fill(self.base_temp)
+        ny, nx = self.shape
+        if temperatures is None:
+            self._window = (ny, 0, nx, 0)
+        else:
+            self.temperatures[:] = temperatures
+            self._window = self._hot_window((0, ny, 0, nx))
+        self.time = 0.0
+
+    def cell_of(self, x, y):
+        """Interior (row, col) of the cell nearest to (x, y)"""
+        return (int(round((y - self.origin[1]) / self.resolution)),
+                int(round((x - self.origin[0]) / self.resolution)))
+
+    def advance(self, positions, dt: float, speed: float = None):
+        """Advance by dt seconds while the source moves through positions
+
+        positions is a (k, 2+) array of source positions in scan order, or
+        empty when the laser is off. Every position is visited by at least
+        one sub-step, and sub-steps stay below the stability limit. Past
+        MAX_SUBSTEPS sub-steps conduction runs for less than dt, but the
+        source still deposits the heat of the full dt. speed is not needed,
+        the positions and dt already imply it.
+        """
+        if dt <= 0:
+            return
+        positions = np.asarray(positions, dtype=np.float64)
+        if not len(positions):
+            positions = np.empty((0, 2))
+        n_steps = min(max(int(np.ceil(dt / self.max_dt)), len(positions)), MAX_SUBSTEPS)
+        source_dt = dt / n_steps
+        sub_dt = min(source_dt, self.max_dt)
+
+        # Window covering the hot cells and the source path, grown by how
+        # far heat conducts in dt
+        window = self._window
+        if len(positions):
+            rows = np.rint((positions[:, 1] - self.origin[1]) / self.resolution)
+            cols = np.rint((positions[:, 0] - self.origin[0]) / self.resolution)
+            path = (int(rows.min()) - self.half, int(rows.max()) + self.half + 1,
+                    int(cols.min()) - self.half, int(cols.max()) + self.half + 1)
+            window = _union(window, path)
+        spread = int(np.ceil(2 * np.sqrt(2 * self.diffusivity * n_steps * sub_dt) / self.resolution)) + 1
+        window = _grow(window, spread, self.shape)
+        if window[0] >= window[1] or window[2] >= window[3]:
+            self.time += dt
+            return
+
+        for step in range(n_steps):
+            self._diffuse(window, sub_dt)
+            if len(positions):
+                x, y = positions[step * len(positions) // n_steps, :2]
+                self._deposit(x, y, source_dt)
+        self.time += dt
+        self._window = self._hot_window(window)
+
+    def _diffuse(self, window, dt):
+        """One explicit step of conduction and substrate cooling over the window"""
+        y0, y1, x0, x1 = window
+        t = self._temps
+        # Interior rows/cols y0..y1 sit at buffer rows y0+1..y1+1
+        centre = t[y0 + 1:y1 + 1, x0 + 1:x1 + 1]
+        lap = self._scratch[y0 + 1:y1 + 1, x0 + 1:x1 + 1]
+        np.add(t[y0:y1, x0 + 1:x1 + 1], t[y0 + 2:y1 + 2, x0 + 1:x1 + 1], out=lap)
+        lap += t[y0 + 1:y1 + 1, x0:x1]
+        lap += t[y0 + 1:y1 + 1, x0 + 2:x1 + 2]
+        # T' = (1 - 4r - c dt) T + r (sum of neighbours) + c dt T_base
+        r = self.diffusivity * dt / (self.resolution * self.resolution)
+        cooling = self.cooling_rate * dt
+        lap *= np.float32(r)
+        lap += np.float32(cooling * self.base_temp)
+        centre *= np.float32(1 - 4 * r - cooling)
+        centre += lap
+
+    def _deposit(self, x, y, dt):
+        """Add the Gaussian source at (x, y) for dt seconds"""
+        row, col = self.cell_of(x, y)
+        half = self.half
+        # Separable profiles into preallocated buffers
+        gx, gy = self._gx, self._gy
+        np.add(self._axis, col * self.resolution + self.origin[0] - x, out=gx)
+        np.add(self._axis, row * self.resolution + self.origin[1] - y, out=gy)
+        for g in (gx, gy):
+            np.square(g, out=g)
+            g *= -1 / (2 * self.sigma**2)
+            np.exp(g, out=g)
+        gy *= self.source_rate * dt
+        np.multiply.outer(gy, gx, out=self._kernel, casting='same_kind')
+        # Clip the kernel to the interior
+        ny, nx = self.shape
+        ky0, kx0 = max(half - row, 0), max(half - col, 0)
+        ky1, kx1 = 2 * half + 1 - max(row + half + 1 - ny, 0), 2 * half + 1 - max(col + half + 1 - nx, 0)
+        if ky0 >= ky1 or kx0 >= kx1:
+            return
+        r0, c0 = row - half + ky0, col - half + kx0
+        target = self._temps[r0 + 1:r0 + 1 + ky1 - ky0, c0 + 1:c0 + 1 + kx1 - kx0]
+        target += self._kernel[ky0:ky1, kx0:kx1]
+
+    def _hot_window(self, window):
+        """Bounding window of the cells above the active threshold, within window"""
+        y0, y1, x0, x1 = window
+        hot = self.temperatures[y0:y1, x0:x1] > self.base_temp + ACTIVE_THRESHOLD
+        rows = np.flatnonzero(hot.any(axis=1))
+        if not len(rows):
+            return (self.shape[0], 0, self.shape[1], 0)
+        cols = np.flatnonzero(hot.any(axis=0))
+        return (y0 + rows[0], y0 + rows[-1] + 1, x0 + cols[0], x0 + cols[-1] + 1)
+
+
+def _union(a, b):
+    if a[0] >= a[1] or a[2] >= a[3]:
+        return b
+    return (min(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3]))
+
+
+def _grow(window, cells, shape):
+    """Grow a window by cells on every side, clipped to the grid"""
+    y0, y1, x0, x1 = window
+    if y0 >= y1 or x0 >= x1:
+        return window
+    ny, nx = shape
+    return (max(y0 - cells, 0), min(y1 + cells, ny), max(x0 - cells, 0), min(x1 + cells, nx))
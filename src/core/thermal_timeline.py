@@ -0,0 +1,264 @@
+import json
+import os
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+from .scan_path import PATH_RESOLUTION, SCAN_SPEED, path_index_at, scan_path
+
+TIMELINE_FRAME_RATE = 30.0  # Baked frames per second of scan time
+CHUNK_FRAMES = 32  # Frames compressed together, the unit read back from disk
+CACHED_CHUNKS = 8  # Decompressed chunks kept in memory for scrubbing
+COMPRESSION_LEVEL = 1  # zlib level, 0 stores frames uncompressed
+FRAME_DTYPE = np.float16  # Temperatures are stored at half precision, well under a kelvin at typical values
+FRAMES_FILE = "frames.bin"
+INDEX_FILE = "index.npy"
+CHUNKS_FILE = "chunks.npy"
+META_FILE = "meta.json"
+
+# One entry per frame: layer, scan time since the layer started and laser position
+FRAME_INDEX_DTYPE = np.dtype([
+    ('layer', np.int32),
+    ('time', np.float64),
+    ('x', np.float64),
+    ('y', np.float64),
+])
+CHUNK_INDEX_DTYPE = np.dtype([('offset', np.int64), ('nbytes', np.int64)])
+
+
+class ThermalTimeline:
+    """Baked temperature frames of scanned layers, played back without simulating
+
+    Frames are (ny, nx) temperature fields on a uniform grid whose cell
+    (0, 0) sits at ``origin``, taken at a fixed rate of scan time while the
+    heat model follows each layer's scan path. Every ``chunk_frames``
+    consecutive frames are stored as one zlib-compressed block of
+    ``FRAME_DTYPE`` in ``frames.bin``; ``index.npy`` records the layer,
+    time and laser position of every frame and ``chunks.npy`` where each
+    block starts. The blocks are read through ``np.memmap`` and the last
+    few decompressed blocks are cached, so jumping to any frame costs at
+    most one block of decompression. With compression level 0 frames are
+    views of the mapped file.
+
+    ``meta.json`` is written last, a timeline without it is incomplete.
+    """
+
+    def __init__(self, directory: str, meta: dict, frames=None, index=None, chunks=None):
+        self.directory = directory
+        self.shape = tuple(meta['shape'])
+        self.origin = tuple(meta['origin'])
+        self.resolution = meta['resolution']
+        self.base_temp = meta['base_temp']
+        self.max_temp = meta['max_temp']
+        self.scan_speed = meta['scan_speed']  # mm/s the frame times were baked at
+        self.frame_rate = meta['frame_rate']
+        self.chunk_frames = meta['chunk_frames']
+        self.compression_level = meta['compression_level']
+        self.n_layers = meta['n_layers']  # Layers of the baked part, baked or not
+        self._meta = meta
+        self._frames = frames
+        self.index = index if index is not None else np.empty(0, dtype=FRAME_INDEX_DTYPE)
+        self.chunks = chunks if chunks is not None else np.empty(0, dtype=CHUNK_INDEX_DTYPE)
+        self._cache = OrderedDict()
+        # Writing state, only used by timelines from create()
+        self._file = None
+        self._pending = []
+        self._written = 0
+        self._entries = []
+        self._chunk_entries = []
+
+    @classmethod
+    def create(cls, directory: str, n_layers: int, shape, origin, resolution: float, base_temp: float,
+               max_temp: float, scan_speed: float = SCAN_SPEED, frame_rate: float = TIMELINE_FRAME_RATE,
+               chunk_frames: int = CHUNK_FRAMES, compression_level: int = COMPRESSION_LEVEL):
+        """Start an empty timeline of (ny, nx) frames in directory, frames are added with append"""
+        os.makedirs(directory, exist_ok=True)
+        meta_path = os.path.join(directory, META_FILE)
+        if os.path.exists(meta_path):
+            os.remove(meta_path)  # Incomplete until closed
+        meta = {
+            'shape': [int(v) for v in shape],
+            'origin': [float(v) for v in origin],
+            'resolution': float(resolution),
+            'base_temp': float(base_temp),
+            'max_temp': float(max_temp),
+            'scan_speed': float(scan_speed),
+            'frame_rate': float(frame_rate),
+            'chunk_frames': int(chunk_frames),
+            'compression_level': int(compression_level),
+            'n_layers': int(n_layers),
+            'dtype': np.dtype(FRAME_DTYPE).str,
+        }
+        timeline = cls(directory, meta)
+        timeline._file = open(os.path.join(directory, FRAMES_FILE), 'wb')
+        return timeline
+
+    @classmethod
+    def open(cls, directory: str):
+        """Open a baked timeline for reading"""
+        meta_path = os.path.join(directory, META_FILE)
+        if not os.path.exists(meta_path):
+            raise ValueError(f"No complete thermal timeline in {directory}")
+        with open(meta_path) as f:
+            meta = json.load(f)
+        index = np.load(os.path.join(directory, INDEX_FILE))
+        chunks = np.load(os.path.join(directory, CHUNKS_FILE))
+        frames_path = os.path.join(directory, FRAMES_FILE)
+        # np.memmap can't map an empty file
+        frames = np.memmap(frames_path, dtype=np.uint8, mode='r') if os.path.getsize(frames_path) else None
+        return cls(directory, meta, frames, index, chunks)
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def layers(self):
+        """Indices of the baked layers, ascending"""
+        return np.unique(self.index['layer'])
+
+    def layer_frames(self, layer: int):
+        """(start, stop) frame range of a layer, empty when it wasn't baked"""
+        layers = self.index['layer']
+        return (int(np.searchsorted(layers, layer, side='left')),
+                int(np.searchsorted(layers, layer, side='right')))
+
+    def has_layer(self, layer: int):
+        start, stop = self.layer_frames(layer)
+        return stop > start
+
+    def duration(self, layer: int):
+        """Scan time in seconds of a baked layer"""
+        start, stop = self.layer_frames(layer)
+        return float(self.index['time'][stop - 1]) if stop > start else 0.0
+
+    def frame_index_at(self, layer: int, time: float):
+        """Index of the last frame of layer at or before time (s), clamped to the layer"""
+        start, stop = self.layer_frames(layer)
+        if stop <= start:
+            raise KeyError(f"Layer {layer} is not baked")
+        offset = int(np.searchsorted(self.index['time'][start:stop], time, side='right')) - 1
+        return start + min(max(offset, 0), stop - start - 1)
+
+    def frame_at(self, layer: int, time: float):
+        """(ny, nx) temperatures of layer at time seconds into its scan"""
+        return self.frame(self.frame_index_at(layer, time))
+
+    def frame(self, index: int):
+        """(ny, nx) read-only temperatures of frame index"""
+        chunk, slot = divmod(index, self.chunk_frames)
+        return self._chunk(chunk)[slot]
+
+    def _chunk(self, chunk: int):
+        """(k, ny, nx) frames of a chunk, decompressed once and cached"""
+        frames = self._cache.get(chunk)
+        if frames is not None:
+            self._cache.move_to_end(chunk)
+            return frames
+        offset, nbytes = (int(v) for v in self.chunks[chunk])
+        data = self._frames[offset:offset + nbytes]
+        if self.compression_level:
+            data = zlib.decompress(data)
+        frames = np.frombuffer(data, dtype=self._meta['dtype']).reshape((-1,) + self.shape)
+        self._cache[chunk] = frames
+        if len(self._cache) > CACHED_CHUNKS:
+            self._cache.popitem(last=False)
+        return frames
+
+    def append(self, layer: int, time: float, position, temperatures):
+        """Add the (ny, nx) temperatures of layer at time seconds, with the laser at position
+
+        Frames must come in order of layer and time.
+        """
+        self._pending.append(np.asarray(temperatures, dtype=FRAME_DTYPE))
+        self._entries.append((layer, time, position[0], position[1]))
+        if len(self._pending) == self.chunk_frames:
+            self._write_chunk()
+
+    def _write_chunk(self):
+        data = np.stack(self._pending).tobytes()
+        if self.compression_level:
+            data = zlib.compress(data, self.compression_level)
+        self._file.write(data)
+        self._chunk_entries.append((self._written, len(data)))
+        self._written += len(data)
+        self._pending = []
+
+    def close(self):
+        """Write the remaining frames and the index; timelines opened for reading are just released"""
+        if self._file is not None:
+            if self._pending:
+                self._write_chunk()
+            self._file.close()
+            self._file = None
+            self.index = np.array(self._entries, dtype=FRAME_INDEX_DTYPE)
+            self.chunks = np.array(self._chunk_entries, dtype=CHUNK_INDEX_DTYPE)
+            np.save(os.path.join(self.directory, INDEX_FILE), self.index)
+            np.save(os.path.join(self.directory, CHUNKS_FILE), self.chunks)
+            path = os.path.join(self.directory, META_FILE)
+            with open(f"{path}.tmp", 'w') as f:
+                json.dump(self._meta, f)
+            os.replace(f"{path}.tmp", path)
+        self._cache.clear()
+        self._frames = None
+
+
+def downsample_max(temperatures, factor: int):
+    """Block maximum over factor x factor cells, edge blocks padded with their own values"""
+    if factor <= 1:
+        return temperatures
+    ny, nx = temperatures.shape
+    padded = np.pad(temperatures, ((0, -ny % factor), (0, -nx % factor)), mode='edge')
+    return padded.reshape(padded.shape[0] // factor, factor, padded.shape[1] // factor, factor).max(axis=(1, 3))
+
+
+def bake_timeline(layers, heat_source, directory: str, indices=None, frame_rate: float = TIMELINE_FRAME_RATE,
+                  scan_speed: float = SCAN_SPEED, downsample: int = 1, path_resolution: float = PATH_RESOLUTION,
+                  compression_level: int = COMPRESSION_LEVEL, progress=None):
+    """Run heat_source's layer solver along the scan path of layers and store frames in directory
+
+    indices selects the layers (all by default). The laser moves at
+    scan_speed and a frame is stored every 1 / frame_rate seconds of scan
+    time plus one at the end of every layer. Consecutive layers start from
+    the heat of the layer below, decayed by the source's decay_factor.
+    Frames are downsampled by block maximum so hot spots stay visible.
+    progress(done, total) is called after every layer. Returns the
+    timeline, open for reading.
+    """
+    bounds = layers.bounds()
+    if bounds is None:
+        raise ValueError("No hatches to bake a thermal timeline for")
+    indices = sorted(range(len(layers)) if indices is None else indices)
+    solver = heat_source.layer_solver((tuple(bounds[0]), tuple(bounds[1])))
+    # Downsampled cell (0, 0) covers the first factor x factor solver cells
+    origin = tuple(o + (downsample - 1) * solver.resolution / 2 for o in solver.origin)
+    shape = downsample_max(solver.temperatures, downsample).shape
+    timeline = ThermalTimeline.create(
+        directory, len(layers), shape, origin, solver.resolution * max(downsample, 1), heat_source.base_temp,
+        heat_source.max_temp, scan_speed, frame_rate, compression_level=compression_level
+    )
+    previous = None
+    for done, layer_idx in enumerate(indices):
+        layer = layers[layer_idx]
+        path, arc = scan_path(layer.points, layer.offsets, layer.z, path_resolution)
+        if previous == layer_idx - 1:
+            start = solver.temperatures - heat_source.base_temp
+            start *= heat_source.decay_factor
+            start += heat_source.base_temp
+            solver.reset(start)
+        else:
+            solver.reset()
+        previous = layer_idx
+        if len(path):
+            duration = arc[-1] / scan_speed
+            times = np.append(np.arange(0.0, duration, 1 / frame_rate), duration)
+            path_index, last_time = 0, 0.0
+            for time in times:
+                index = path_index_at(arc, time * scan_speed)
+                solver.advance(path[path_index:index + 1], time - last_time, scan_speed)
+                path_index, last_time = index + 1, time
+                timeline.append(layer_idx, time, path[index], downsample_max(solver.temperatures, downsample))
+        if progress is not None:
+            progress(done + 1, len(indices))
+    timeline.close()
+    return ThermalTimeline.open(directory)
@@ -0,0 +1,305 @@
+"""Headless rendering of layer image stacks and videos
+
+Runs without a display, e.g. ``xvfb-run python -m src.gui.batch_render part.cli
+--out frames`` or with VTK's OSMesa/EGL off-screen window on a GPU-less box.
+``--heat-timeline DIR`` bakes the heat of the layers into a thermal timeline
+the viewer plays back without simulating.
+"""
+import argparse
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+
+import numpy as np
+import pyvista as pv
+
+from src.core.heat_model import HeatSource
+from src.core.rosenthal import RosenthalSource
+from src.core.scan_path import SCAN_SPEED
+from src.core.thermal_timeline import TIMELINE_FRAME_RATE, bake_timeline
+from .hatch_mesh import FULL_PART_MAX_BYTES, build_layer_mesh, full_part_polydata
+
+WINDOW_SIZE = (1280, 960)  # Frame size in pixels, even so it can be encoded as H.264
+VIDEO_FPS = 10  # Layers per second of video
+QUEUE_FRAMES = 8  # Meshes/frames in flight between the producer, renderer and writer
+
+THEMES = {
+    "dark": {'background': "#1e1e1e", 'path': "white", 'axis': "white"},
+    "light": {'background': "white", 'path': "black", 'axis': "black"},
+}
+
+
+class OffscreenLayerRenderer:
+    """Render layers the way the viewer shows them, to image arrays
+
+    One off-screen plotter is reused for every frame. The hatch actor's
+    dataset and the bounds box are swapped per layer, and the camera is
+    fitted to the whole part once so every frame lines up.
+    """
+
+    def __init__(self, bounds, theme: str = "dark", window_size=WINDOW_SIZE,
+                 line_width: int = 2, lines_as_tubes: bool = True):
+        self.style = THEMES[theme]
+        self.bounds = bounds
+        self.line_width = line_width
+        self.lines_as_tubes = lines_as_tubes
+        self.plotter = pv.Plotter(off_screen=True, window_size=list(window_size))
+        self.plotter.set_background(self.style['background'])
+        self.plotter.add_axes(color=self.style['axis'])
+        self._hatch_actor = None
+        self._bounds_actor = None
+
+    def _part_bounds(self, z_min, z_max):
+        min_coords, max_coords = self.bounds
+        return [min_coords[0], max_coords[0], min_coords[1], max_coords[1], z_min, z_max]
+
+    def _show(self, mesh, bounds):
+        """Show mesh with a bounds box, reusing the actors of the previous frame"""
+        if self._hatch_actor is None:
+            self._hatch_actor = self.plotter.add_mesh(
+                mesh,
+                color=self.style['path'],
+                line_width=self.line_width,
+                render_lines_as_tubes=self.lines_as_tubes,
+                name="hatches"
+            )
+            self._bounds_actor = self.plotter.show_bounds(
+                bounds=bounds,
+                grid='front',
+                location='outer',
+                color=self.style['axis'],
+            )
+        else:
+            self._hatch_actor.mapper.dataset = mesh
+            self._bounds_actor.SetBounds(bounds)
+
+    def render_layer(self, mesh, z):
+        """Return an (h, w, 3) uint8 image of one layer's hatch mesh at height z"""
+        first = self._hatch_actor is None
+        self._show(mesh, self._part_bounds(z - 0.01, z + 0.01))
+        if first:
+            self.plotter.camera_position = "xy"
+            self.plotter.reset_camera(bounds=self._part_bounds(z - 0.01, z + 0.01))
+        return self.plotter.screenshot(return_img=True)
+
+    def render_full_part(self, mesh):
+        """Return an image of the merged full-part mesh in an isometric view"""
+        min_coords, max_coords = self.bounds
+        self._show(mesh, self._part_bounds(min_coords[2], max_coords[2]))
+        self.plotter.view_isometric()
+        self.plotter.reset_camera()
+        return self.plotter.screenshot(return_img=True)
+
+    def close(self):
+        self.plotter.close()
+
+
+class PngStackWriter:
+    """Write frames as numbered PNG files"""
+
+    def __init__(self, out_dir: str, prefix: str = "layer"):
+        self.out_dir = out_dir
+        self.prefix = prefix
+        os.makedirs(out_dir, exist_ok=True)
+
+    def write(self, index, image):
+        path = os.path.join(self.out_dir, f"{self.prefix}_{index:05d}.png")
+        pv.Texture(image).to_image().save(path)
+
+    def close(self):
+        pass
+
+
+class FfmpegVideoWriter:
+    """Encode frames to a video by piping raw RGB into ffmpeg"""
+
+    def __init__(self, path: str, window_size=WINDOW_SIZE, fps: float = VIDEO_FPS):
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            raise RuntimeError("Writing videos needs ffmpeg on the PATH")
+        width, height = window_size
+        self._process = subprocess.Popen(
+            [ffmpeg, "-y", "-loglevel", "error",
+             "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}", "-r", str(fps),
+             "-i", "-", "-c:v", "libx264", "-pix_fmt", "yuv420p", path],
+            stdin=subprocess.PIPE,
+        )
+
+    def write(self, index, image):
+        self._process.stdin.write(np.ascontiguousarray(image[:, :, :3]).tobytes())
+
+    def close(self):
+        self._process.stdin.close()
+        if self._process.wait() != 0:
+            raise RuntimeError(f"ffmpeg exited with status {self._process.returncode}")
+
+
+def _produce_meshes(layers, indices, meshes: queue.Queue, stop: threading.Event):
+    """Producer thread: build layer meshes ahead of the renderer"""
+    try:
+        for index in indices:
+            if stop.is_set():
+                return
+            meshes.put((index, layers[index].z, build_layer_mesh(layers, index)))
+    finally:
+        meshes.put(None)
+
+
+def _write_frames(writers, frames: queue.Queue, errors: list):
+    """Writer thread: hand every rendered frame to each writer"""
+    while True:
+        item = frames.get()
+        if item is None:
+            return
+        if errors:
+            continue  # Drain so the renderer never blocks
+        try:
+            for writer in writers:
+                writer.write(*item)
+        except Exception as e:
+            errors.append(e)
+
+
+def render_layers(layers, indices, writers, theme: str = "dark", window_size=WINDOW_SIZE):
+    """Render layers to images and pass them to writers, return frames per second
+
+    Meshes are built on a producer thread and frames are written on a
+    writer thread while this thread renders, with bounded queues between.
+    """
+    indices = list(indices)
+    bounds = layers.bounds()
+    if bounds is None or not indices:
+        return 0.0
+    renderer = OffscreenLayerRenderer(bounds, theme, window_size)
+    meshes = queue.Queue(maxsize=QUEUE_FRAMES)
+    frames = queue.Queue(maxsize=QUEUE_FRAMES)
+    stop = threading.Event()
+    errors = []
+    producer = threading.Thread(target=_produce_meshes, args=(layers, indices, meshes, stop), daemon=True)
+    writer = threading.Thread(target=_write_frames, args=(writers, frames, errors), daemon=True)
+
+    start_time = time.perf_counter()
+    producer.start()
+    writer.start()
+    n_frames = 0
+    try:
+        while (item := meshes.get()) is not None:
+            index, z, mesh = item
+            if mesh.n_lines:
+                frames.put((index, renderer.render_layer(mesh, z)))
+                n_frames += 1
+            if errors:
+                break
+    finally:
+        stop.set()
+        # Unblock the producer if it is waiting on a full queue
+        while producer.is_alive():
+            try:
+                meshes.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        frames.put(None)
+        writer.join()
+        renderer.close()
+        for w in writers:
+            w.close()
+    if errors:
+        raise errors[0]
+
+    fps = n_frames / max(time.perf_counter() - start_time, 1e-9)
+    print(f"Rendered {n_frames} layers at {fps:.1f} frames per second")
+    return fps
+
+
+def render_full_part(layers, path: str, theme: str = "dark", window_size=WINDOW_SIZE,
+                     max_bytes: int = FULL_PART_MAX_BYTES):
+    """Render the merged full part to a PNG file"""
+    bounds = layers.bounds()
+    if bounds is None:
+        return
+    mesh, _ = full_part_polydata(layers, max_bytes)
+    renderer = OffscreenLayerRenderer(bounds, theme, window_size)
+    try:
+        pv.Texture(renderer.render_full_part(mesh)).to_image().save(path)
+    finally:
+        renderer.close()
+
+
+def load_layers(file_path: str):
+    """Open a CLI file the way the viewer does: cached, indexed or parsed"""
+    from src.core.cli_index import INDEXED_LOAD_BYTES, CliFile
+    from src.core.cli_io import detect_compression
+    from src.core.cli_parser import parse_cli
+    from src.core.geometry_cache import load_cached
+
+    cached = load_cached(file_path)
+    if cached is not None:
+        return cached['layers']
+    if os.path.getsize(file_path) >= INDEXED_LOAD_BYTES and detect_compression(file_path) is None:
+        return CliFile(file_path)
+    return parse_cli(file_path)['layers']
+
+
+def _parse_range(text: str, n_layers: int):
+    """Parse START:STOP[:STEP] (Python slice syntax) into a range of layer indices"""
+    parts = [int(part) if part else None for part in text.split(':')]
+    return range(n_layers)[slice(*parts)]
+
+
+def bake_heat(layers, directory: str, indices, model: str = "gaussian", sigma: float = 0.1,
+              max_temp: float = 1000, **kwargs):
+    """Bake the heat of layers with the viewer's heat source settings, reporting progress"""
+    if model == "rosenthal":
+        heat_source = RosenthalSource(max_temp=max_temp, sigma=sigma, scan_speed=kwargs.get('scan_speed', SCAN_SPEED))
+    else:
+        heat_source = HeatSource(max_temp=max_temp, sigma=sigma)
+    start = time.time()
+
+    def progress(done, total):
+        print(f"Baked {done}/{total} layers in {time.time() - start:.1f} seconds")
+
+    return bake_timeline(layers, heat_source, directory, indices, progress=progress, **kwargs)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render CLI layers to PNG stacks and videos without a display")
+    parser.add_argument("file", help="CLI file to render")
+    parser.add_argument("--out", help="Directory for the PNG stack")
+    parser.add_argument("--video", help="Video file to encode with ffmpeg, e.g. layers.mp4")
+    parser.add_argument("--layers", default=":", help="Layer range as START:STOP[:STEP] (default: all)")
+    parser.add_argument("--full-part", help="Also render the 3D preview to this PNG file")
+    parser.add_argument("--theme", choices=sorted(THEMES), default="dark")
+    parser.add_argument("--size", default=f"{WINDOW_SIZE[0]}x{WINDOW_SIZE[1]}", help="Frame size as WIDTHxHEIGHT")
+    parser.add_argument("--fps", type=float, default=VIDEO_FPS, help="Layers per second of video")
+    parser.add_argument("--heat-timeline", help="Directory to bake the layers' thermal timeline into")
+    parser.add_argument("--heat-model", choices=["gaussian", "rosenthal"], default="gaussian")
+    parser.add_argument("--speed", type=float, default=SCAN_SPEED, help="Scan speed of the baked timeline in mm/s")
+    parser.add_argument("--frame-rate", type=float, default=TIMELINE_FRAME_RATE,
+                        help="Baked frames per second of scan time")
+    parser.add_argument("--downsample", type=int, default=1, help="Cells of the heat solution per baked cell, per axis")
+    args = parser.parse_args(argv)
+    if not (args.out or args.video or args.full_part or args.heat_timeline):
+        parser.error("nothing to do, give --out, --video, --full-part or --heat-timeline")
+
+    window_size = tuple(int(v) for v in args.size.lower().split('x'))
+    pv.OFF_SCREEN = True
+    layers = load_layers(args.file)
+    writers = []
+    if args.out:
+        writers.append(PngStackWriter(args.out))
+    if args.video:
+        writers.append(FfmpegVideoWriter(args.video, window_size, args.fps))
+    if writers:
+        render_layers(layers, _parse_range(args.layers, len(layers)), writers, args.theme, window_size)
+    if args.full_part:
+        render_full_part(layers, args.full_part, args.theme, window_size)
+    if args.heat_timeline:
+        bake_heat(layers, args.heat_timeline, _parse_range(args.layers, len(layers)), args.heat_model,
+                  scan_speed=args.speed, frame_rate=args.frame_rate, downsample=args.downsample).close()
+
+
+if __name__ == "__main__":
+    main()
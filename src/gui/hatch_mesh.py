@@ -0,0 +1,132 @@
+import math
+
+import numpy as np
+import pyvista as pv
+
+from src.core.layer_store import LayerStore
+
+FULL_PART_MAX_BYTES = 512 * 1024 * 1024  # Memory budget of the merged 3D preview mesh
+_BYTES_PER_POINT = 3 * 4 + 8  # float32 xyz plus its connectivity entry
+_BYTES_PER_HATCH = 2 * 8  # Cell size and offset entries
+
+
+def hatch_line_cells(offsets):
+    """Build a packed VTK lines array with one polyline per hatch
+
+    ``offsets`` holds the start of every hatch in the points array followed
+    by the end of the last one. Hatches with fewer than two points can't
+    form a line and are skipped.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    counts = np.diff(offsets)
+    keep = counts >= 2
+    starts = offsets[:-1][keep]
+    counts = counts[keep]
+    if len(counts) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    # Each cell is [n, id_0, ..., id_n-1]
+    cell_sizes = counts + 1
+    cell_starts = np.cumsum(cell_sizes) - cell_sizes
+    cells = np.empty(cell_sizes.sum(), dtype=np.int64)
+    cells[cell_starts] = counts
+    is_id = np.ones(len(cells), dtype=bool)
+    is_id[cell_starts] = False
+    point_starts = np.cumsum(counts) - counts
+    cells[is_id] = np.arange(counts.sum()) - np.repeat(point_starts - starts, counts)
+    return cells
+
+
+def hatch_polydata(points, offsets):
+    """Return all hatches of ``points`` (n, 3) as a single PolyData of polylines"""
+    mesh = pv.PolyData()
+    mesh.points = np.asarray(points)
+    mesh.lines = hatch_line_cells(offsets)
+    return mesh
+
+
+def decimated_hatch_polydata(points, offsets, max_hatches: int):
+    """Like hatch_polydata, but keeping only about max_hatches evenly spread hatches"""
+    offsets = np.asarray(offsets, dtype=np.int64)
+    counts = np.diff(offsets)
+    stride = max(1, math.ceil(len(counts) / max_hatches))
+    if stride == 1:
+        return hatch_polydata(points, offsets)
+    keep = np.zeros(len(counts), dtype=bool)
+    keep[::stride] = True
+    points = np.asarray(points)[np.repeat(keep, counts)]
+    return hatch_polydata(points, np.concatenate(([0], np.cumsum(counts[keep]))))
+
+
+def estimate_mesh_bytes(n_points: int, n_hatches: int) -> int:
+    """Approximate memory of a polyline mesh with this many points and hatches"""
+    return n_points * _BYTES_PER_POINT + n_hatches * _BYTES_PER_HATCH
+
+
+def sample_layers(layers, max_bytes: int = FULL_PART_MAX_BYTES):
+    """Return (store, stride) holding every stride-th layer of any layer container
+
+    A LayerStore is returned as is. Lazily decoded containers (an indexed
+    CliFile) are copied into a LayerStore, with the stride estimated from
+    the size of the first layer so a huge file is never decoded in full.
+    """
+    if isinstance(layers, LayerStore):
+        return layers, 1
+    if len(layers) == 0:
+        return LayerStore(), 1
+    first = layers[0]
+    estimate = estimate_mesh_bytes(len(first.points), first.n_hatches) * len(layers)
+    stride = max(1, math.ceil(estimate / max_bytes))
+    store = LayerStore()
+    for index in range(0, len(layers), stride):
+        layer = layers[index]
+        store.append_layer(layer.layer_number, layer.z, layer.points, np.diff(layer.offsets))
+    return store, stride
+
+
+def full_part_arrays(store: LayerStore, max_bytes: int = FULL_PART_MAX_BYTES, stride: int = None):
+    """Return (points, offsets, stride) of all hatches in a store, each layer at its own z
+
+    Only every stride-th layer is kept. By default the stride is the
+    smallest that keeps the mesh within ``max_bytes``.
+    """
+    hatch_offsets = store.hatch_offsets
+    layer_offsets = store.layer_offsets
+    points_per_layer = np.diff(hatch_offsets[layer_offsets])
+    counts = np.diff(hatch_offsets)
+    coords = store.coords
+    z = store.z
+
+    if stride is None:
+        stride = max(1, math.ceil(estimate_mesh_bytes(store.n_points, store.n_hatches) / max_bytes))
+    if stride > 1:
+        # Decimate by dropping whole layers
+        keep = np.zeros(len(store), dtype=bool)
+        keep[::stride] = True
+        coords = coords[np.repeat(keep, points_per_layer)]
+        counts = counts[np.repeat(keep, np.diff(layer_offsets))]
+        z = z[keep]
+        points_per_layer = points_per_layer[keep]
+
+    points = np.empty((len(coords), 3), dtype=np.float32)
+    points[:, :2] = coords
+    points[:, 2] = np.repeat(z, points_per_layer)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+    return points, offsets, stride
+
+
+def full_part_polydata(layers, max_bytes: int = FULL_PART_MAX_BYTES):
+    """Merge all layers into one PolyData of polylines, each layer at its own z
+
+    If the merged mesh would take more than ``max_bytes`` only every
+    stride-th layer is included. Returns (mesh, stride).
+    """
+    store, sample_stride = sample_layers(layers, max_bytes)
+    points, offsets, stride = full_part_arrays(store, max_bytes)
+    return hatch_polydata(points, offsets), stride * sample_stride
+
+
+def build_layer_mesh(layers, index):
+    """Build the hatch mesh of one layer"""
+    layer = layers[index]
+    return hatch_polydata(layer.points3d(), layer.offsets)
@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+
+from PyQt6.QtCore import QRunnable
+
+from .hatch_mesh import build_layer_mesh
+
+LAYER_MESH_CACHE_BYTES = 256 * 1024 * 1024  # Memory budget for built layer meshes
+PREFETCH_LAYERS = 8  # Layers built ahead of the one shown, in the scrubbing direction
+
+
+class LayerMeshCache:
+    """LRU of built per-layer hatch meshes, bounded by bytes
+
+    Safe to fill from a prefetch thread while the GUI thread reads it.
+    ``generation`` changes whenever the cache is cleared or a new
+    prefetch supersedes the running one, telling workers to stop.
+    """
+
+    def __init__(self, max_bytes: int = LAYER_MESH_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.generation = 0
+        self._meshes = OrderedDict()  # layer index -> (mesh, nbytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, index):
+        """Return the cached mesh of a layer, or None"""
+        with self._lock:
+            entry = self._meshes.get(index)
+            if entry is None:
+                return None
+            self._meshes.move_to_end(index)
+            return entry[0]
+
+    def put(self, index, mesh):
+        """Add a layer's mesh, evicting least recently used ones beyond max_bytes"""
+        nbytes = mesh.actual_memory_size * 1024  # VTK reports kibibytes
+        with self._lock:
+            old = self._meshes.pop(index, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._meshes[index] = (mesh, nbytes)
+            self._bytes += nbytes
+            # Always keep the mesh just added
+            while self._bytes > self.max_bytes and len(self._meshes) > 1:
+                _, (_, evicted_bytes) = self._meshes.popitem(last=False)
+                self._bytes -= evicted_bytes
+
+    def __contains__(self, index):
+        with self._lock:
+            return index in self._meshes
+
+    def __len__(self):
+        return len(self._meshes)
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def clear(self):
+        """Drop every mesh, e.g. when another file is loaded"""
+        with self._lock:
+            self._meshes.clear()
+            self._bytes = 0
+            self.generation += 1
+
+
+class PrefetchTask(QRunnable):
+    """Build layer meshes into a LayerMeshCache on a QThreadPool worker"""
+
+    def __init__(self, cache: LayerMeshCache, layers, indices):
+        super().__init__()
+        self.cache = cache
+        self.layers = layers
+        self.indices = indices
+        self.generation = cache.generation
+
+    def run(self):
+        for index in self.indices:
+            # A newer prefetch or a cleared cache supersedes this one
+            if self.cache.generation != self.generation:
+                return
+            if index in self.cache:
+                continue
+            try:
+                self.cache.put(index, build_layer_mesh(self.layers, index))
+            except Exception as e:
+                print(f"Error prefetching layer {index}: {e}")
+                return
+
+
+def prefetch_indices(index: int, direction: int, n_layers: int, count: int = PREFETCH_LAYERS):
+    """Layers to build next: ahead in the scrubbing direction, or both ways when it is unknown"""
+    if direction > 0:
+        candidates = range(index + 1, index + 1 + count)
+    elif direction < 0:
+        candidates = range(index - 1, index - 1 - count, -1)
+    else:
+        candidates = [i for step in range(1, count // 2 + 1) for i in (index + step, index - step)]
+    return [i for i in candidates if 0 <= i < n_layers]
@@ -0,0 +1,134 @@
+import numpy as np
+import pyvista as pv
+
+from .hatch_mesh import FULL_PART_MAX_BYTES, full_part_arrays, hatch_line_cells, hatch_polydata, sample_layers
+
+LOD_FRAME_TIME = 1 / 30  # Seconds per frame to stay under while the camera moves
+LOD_LAYER_STRIDE = 4  # Layers kept by the medium level: every Nth
+OUTLINE_DIRECTIONS = 64  # Directions sampled for each layer's outline hull
+FAR_DISTANCE_RATIO = 4.0  # Camera distance, in part diagonals, beyond which idle views drop detail
+COLLINEAR_TOLERANCE = 1e-3  # Relative deviation below which a vertex is considered on a straight line
+
+
+def merge_collinear(points, offsets, tolerance: float = COLLINEAR_TOLERANCE):
+    """Drop polyline vertices that lie on the straight line through their neighbours
+
+    Returns (points, offsets) of the simplified hatches. Consecutive
+    vectors that continue in the same direction become a single vector.
+    """
+    points = np.asarray(points)
+    offsets = np.asarray(offsets, dtype=np.int64)
+    if len(points) < 3:
+        return points, offsets
+
+    before = points[1:-1, :2] - points[:-2, :2]
+    after = points[2:, :2] - points[1:-1, :2]
+    cross = before[:, 0] * after[:, 1] - before[:, 1] * after[:, 0]
+    dot = (before * after).sum(axis=1)
+    scale = np.hypot(before[:, 0], before[:, 1]) * np.hypot(after[:, 0], after[:, 1])
+    straight = (np.abs(cross) <= tolerance * scale) & (dot > 0)
+
+    # Hatch end points are always kept
+    drop = np.zeros(len(points), dtype=bool)
+    drop[1:-1] = straight
+    drop[offsets[:-1][offsets[:-1] < len(points)]] = False
+    drop[offsets[1:][offsets[1:] > 0] - 1] = False
+
+    kept_before = np.concatenate(([0], np.cumsum(~drop)))
+    return points[~drop], kept_before[offsets]
+
+
+def _layer_outline(points, n_directions: int = OUTLINE_DIRECTIONS):
+    """Approximate convex hull of a layer's (n, 2) points as a closed polygon
+
+    The extreme point in each of ``n_directions`` evenly spaced directions
+    is a hull vertex, and taken in direction order they trace the hull.
+    """
+    angles = np.linspace(0, 2 * np.pi, n_directions, endpoint=False)
+    directions = np.stack([np.cos(angles), np.sin(angles)])
+    extremes = np.argmax(points @ directions, axis=0)
+    # Neighbouring directions often hit the same vertex
+    extremes = extremes[np.concatenate(([True], extremes[1:] != extremes[:-1]))]
+    if len(extremes) > 1 and extremes[0] == extremes[-1]:
+        extremes = extremes[:-1]
+    return points[np.append(extremes, extremes[0])]
+
+
+def outline_polydata(store, n_directions: int = OUTLINE_DIRECTIONS):
+    """Return one closed outline hull per layer as a single PolyData"""
+    outlines = []
+    z = []
+    for layer in store:
+        if len(layer.points) == 0:
+            continue
+        outline = _layer_outline(layer.points.astype(np.float64), n_directions)
+        outlines.append(outline)
+        z.append(np.full(len(outline), layer.z))
+    if not outlines:
+        return pv.PolyData()
+    points = np.column_stack([np.concatenate(outlines), np.concatenate(z)]).astype(np.float32)
+    offsets = np.concatenate(([0], np.cumsum([len(outline) for outline in outlines])))
+    mesh = pv.PolyData()
+    mesh.points = points
+    mesh.lines = hatch_line_cells(offsets)
+    return mesh
+
+
+class PartLod:
+    """Precomputed detail levels of the full-part preview
+
+    Level 0 is the merged mesh of every layer (decimated only to stay
+    within ``max_bytes``), level 1 keeps every ``layer_stride``-th layer
+    with collinear vectors merged, and level 2 is one outline hull per
+    layer. ``choose_level`` picks the finest level expected to render
+    within ``frame_time`` while the camera moves, scaling the measured
+    render time of a level by its point count.
+    """
+
+    def __init__(self, layers, max_bytes: int = FULL_PART_MAX_BYTES, layer_stride: int = LOD_LAYER_STRIDE,
+                 frame_time: float = LOD_FRAME_TIME, far_distance_ratio: float = FAR_DISTANCE_RATIO):
+        self.frame_time = frame_time
+        self.far_distance_ratio = far_distance_ratio
+        store, sample_stride = sample_layers(layers, max_bytes)
+
+        points, offsets, stride = full_part_arrays(store, max_bytes)
+        self.stride = stride * sample_stride  # Layer stride of the finest level
+        full = hatch_polydata(points, offsets)
+        points, offsets, _ = full_part_arrays(store, stride=stride * layer_stride)
+        coarse = hatch_polydata(*merge_collinear(points, offsets))
+        self.meshes = [full, coarse, outline_polydata(store)]
+        self.render_times = [None] * len(self.meshes)  # Last measured seconds per frame
+        self.level = 0
+
+    @property
+    def full_mesh(self):
+        return self.meshes[0]
+
+    def record_render_time(self, seconds: float):
+        """Remember how long the current level took to render"""
+        if seconds > 0:
+            self.render_times[self.level] = seconds
+
+    def _estimated_time(self, level: int):
+        """Measured render time of a level, or one scaled from a measured level"""
+        if self.render_times[level] is not None:
+            return self.render_times[level]
+        for measured, seconds in enumerate(self.render_times):
+            if seconds is not None and self.meshes[measured].n_points:
+                return seconds * self.meshes[level].n_points / self.meshes[measured].n_points
+        return 0.0  # Nothing measured yet, assume it is fast
+
+    def choose_level(self, interacting: bool, camera_distance: float = None):
+        """Select the level for the current interaction state and camera distance"""
+        level = 0
+        diagonal = self.full_mesh.length
+        if camera_distance is not None and diagonal and camera_distance > self.far_distance_ratio * diagonal:
+            level = 1  # Layers can't be told apart from this far away
+        if interacting:
+            while level < len(self.meshes) - 1 and self._estimated_time(level) > self.frame_time:
+                level += 1
+        # Skip levels that ended up empty
+        while level > 0 and self.meshes[level].n_lines == 0:
+            level -= 1
+        self.level = level
+        return level
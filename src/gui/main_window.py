@@ -5,7 +5,7 @@ import sys
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QVBoxLayout, QWidget, QHBoxLayout,
     QSlider, QLabel, QCheckBox, QFileDialog, QToolBar, QStatusBar,
-    QPushButton, QFrame
+    QPushButton, QFrame, QComboBox
 )
 from PyQt6.QtGui import QAction, QFont
 from PyQt6.QtCore import Qt, QSize, pyqtSignal
@@ -17,6 +17,7 @@ from .styles import get_dynamic_styles
 def get_icon(name, dark_mode=True):
     icons = {
         "open": "📂",
+        "follow": "📡",
         "reset": "🔄",
         "theme": "🌙" if dark_mode else "☀️",
         "3d": "📦",
@@ -35,7 +36,11 @@ class AMVisualizer(QMainWindow):
         self.dark_mode = True  # Default to dark mode
         self._setup_ui()
         self.cli_data = None
+        self.loaded_file_path = None
         self.viz_widget.layer_completed.connect(self._on_layer_completed) # required for full layer after layer animation
+        self.viz_widget.layers_loaded.connect(self._on_layers_loaded)
+        self.viz_widget.loading_finished.connect(self._on_loading_finished)
+        self.viz_widget.frame_rate_measured.connect(self._on_frame_rate_measured)
         
     
     def _setup_ui(self):
@@ -94,6 +99,7 @@ class AMVisualizer(QMainWindow):
         self.layer_slider.setMinimum(0)
         self.layer_slider.setMaximum(0)
         self.layer_slider.valueChanged.connect(self._change_layer)
+        self.layer_slider.sliderReleased.connect(self._on_layer_slider_released)
         self.layer_slider.setStyleSheet(get_dynamic_styles(self.dark_mode, "slider"))
         control_layout.addWidget(self.layer_slider, 4)
         
@@ -102,6 +108,14 @@ class AMVisualizer(QMainWindow):
         self.heat_toggle.setFont(QFont("Segoe UI", 10))
         self.heat_toggle.stateChanged.connect(self._toggle_heat)
         control_layout.addWidget(self.heat_toggle)
+
+        # Heat source model
+        self.heat_model_combo = QComboBox()
+        self.heat_model_combo.addItems(["Gaussian", "Rosenthal"])
+        self.heat_model_combo.setFont(QFont("Segoe UI", 10))
+        self.heat_model_combo.setToolTip("Gaussian spot with finite-difference conduction, or Rosenthal's moving point source")
+        self.heat_model_combo.currentTextChanged.connect(self._change_heat_model)
+        control_layout.addWidget(self.heat_model_combo)
         
         # Fit to view button
         self.fit_button = QPushButton(get_icon("fit") + " Fit View")
@@ -159,6 +173,14 @@ class AMVisualizer(QMainWindow):
         open_action.triggered.connect(self._open_file)
         open_action.setFont(QFont("Segoe UI", 10))
         toolbar.addAction(open_action)
+
+        # Follow a file the slicer is still writing, layers appear as they are written
+        self.follow_action = QAction(get_icon("follow") + " Follow CLI", self)
+        self.follow_action.setCheckable(True)
+        self.follow_action.setShortcut("Ctrl+Shift+O")
+        self.follow_action.triggered.connect(self._toggle_follow)
+        self.follow_action.setFont(QFont("Segoe UI", 10))
+        toolbar.addAction(self.follow_action)
         
         reset_view_action = QAction(get_icon("reset") + " Reset View", self)
         reset_view_action.setShortcut("R")
@@ -194,22 +216,39 @@ class AMVisualizer(QMainWindow):
         self.continuous_action.triggered.connect(self._play_continuous)
         toolbar.addAction(self.continuous_action)
 
+        # Heat baked with python -m src.gui.batch_render --heat-timeline, played instead of solved
+        self.timeline_action = QAction(get_icon("open") + " Heat Timeline", self)
+        self.timeline_action.setCheckable(True)
+        self.timeline_action.triggered.connect(self._toggle_heat_timeline)
+        self.timeline_action.setFont(QFont("Segoe UI", 10))
+        toolbar.addAction(self.timeline_action)
+
         # Animation speed control
         speed_container = QWidget()
         speed_layout = QVBoxLayout(speed_container)
         speed_layout.setContentsMargins(0, 0, 0, 0)
-        speed_label = QLabel("Speed:")
+        speed_label = QLabel("Speed (mm/s):")
         control_layout.addWidget(speed_label)
 
         self.speed_slider = QSlider(Qt.Orientation.Horizontal)
-        self.speed_slider.setRange(1, 500)  # 1ms to 500ms
-        self.speed_slider.setValue(1)
+        self.speed_slider.setRange(1, 2000)  # Laser scan speed, 1 to 2000 mm/s
+        self.speed_slider.setValue(int(self.viz_widget.scan_speed))
         self.speed_slider.valueChanged.connect(self._change_speed)
         self.speed_slider.setStyleSheet(get_dynamic_styles(self.dark_mode, "slider"))
         self.speed_slider.setMinimumHeight(40)
         speed_layout.addWidget(self.speed_slider)
         control_layout.addWidget(self.speed_slider)
 
+        # Position of the laser along the animated layer, drag to scrub
+        control_layout.addWidget(QLabel("Scan:"))
+        self.scan_slider = QSlider(Qt.Orientation.Horizontal)
+        self.scan_slider.setRange(0, 1000)  # Per mille of the layer's scan length
+        self.scan_slider.valueChanged.connect(self._seek_scan)
+        self.scan_slider.setStyleSheet(get_dynamic_styles(self.dark_mode, "slider"))
+        control_layout.addWidget(self.scan_slider, 2)
+        self.viz_widget.scan_progressed.connect(self._on_scan_progressed)
+        self.viz_widget.heat_catch_up_progressed.connect(self._on_heat_catch_up_progressed)
+
         # Status bar
         self.status_bar = QStatusBar()
         self.status_bar.setFont(QFont("Segoe UI", 9))
@@ -263,8 +302,11 @@ class AMVisualizer(QMainWindow):
 
     def _on_layer_completed(self, next_layer):
         """Handle layer completion during continuous animation"""
-        # Update UI first
+        # Update UI first, drawing the layer right away rather than through the render scheduler
+        self.layer_slider.blockSignals(True)
         self.layer_slider.setValue(next_layer)
+        self.layer_slider.blockSignals(False)
+        self.viz_widget.plot_layer(next_layer)
         self.layer_label.setText(f"Layer: {next_layer}/{self.layer_slider.maximum()}")
         self.status_bar.showMessage(f"Starting layer {next_layer}", 1000)
         
@@ -279,7 +321,7 @@ class AMVisualizer(QMainWindow):
         """Start continuous animation across layers"""
         if self.viz_widget.cli_data:
             # Reset heat accumulation
-            self.viz_widget.layer_heat_grids = {}
+            self.viz_widget.reset_thermal_history()
                 
             # Start animation
             self.viz_widget.start_animation(
@@ -294,7 +336,12 @@ class AMVisualizer(QMainWindow):
             self.viz_widget.stop_animation()
             
         self.layer_label.setText(f"Layer: {layer_idx}/{self.layer_slider.maximum()}")
-        self.viz_widget.plot_layer(layer_idx)
+        # Renders are coalesced, a preview is shown while the handle is dragged
+        self.viz_widget.request_layer(layer_idx, preview=self.layer_slider.isSliderDown())
+
+    def _on_layer_slider_released(self):
+        """Render the full layer once scrubbing stops"""
+        self.viz_widget.request_layer(self.layer_slider.value())
 
     def _on_change_layer_requested(self, layer_idx):
         """Handle request to change layer from visualization"""
@@ -302,16 +349,58 @@ class AMVisualizer(QMainWindow):
         self.layer_label.setText(f"Layer: {layer_idx}/{self.layer_slider.maximum()}")
         self.status_bar.showMessage(f"Starting layer {layer_idx}", 1000)
 
+    def _on_frame_rate_measured(self, fps):
+        """Show the measured animation frame rate"""
+        self.status_bar.showMessage(f"Animation: {fps:.1f} FPS", 2000)
+
     def _on_animation_finished(self):
         """Handle animation completion"""
         self.status_bar.showMessage("Animation completed", 3000)
 
     def _change_speed(self, value):
-        """Change animation speed"""
-        if hasattr(self.viz_widget, 'animation_timer'):
-            self.viz_widget.animation_speed = value
-            if self.viz_widget.is_animating:
-                self.viz_widget.animation_timer.setInterval(value)
+        """Change the laser scan speed (mm/s) of the animation"""
+        self.viz_widget.scan_speed = float(value)
+        if hasattr(self.viz_widget.heat_model, 'scan_speed'):
+            self.viz_widget.heat_model.scan_speed = float(value)  # Shapes Rosenthal heat maps
+        self.status_bar.showMessage(f"Scan speed: {value} mm/s", 2000)
+
+    def _seek_scan(self, value):
+        """Jump the animated layer to the scan slider position"""
+        self.viz_widget.seek_animation(value / 1000)
+
+    def _on_scan_progressed(self, fraction):
+        """Follow the laser with the scan slider, unless it is being dragged"""
+        if not self.scan_slider.isSliderDown():
+            self.scan_slider.blockSignals(True)
+            self.scan_slider.setValue(round(fraction * 1000))
+            self.scan_slider.blockSignals(False)
+
+    def _on_heat_catch_up_progressed(self, fraction):
+        """Report re-solving live heat after a seek, baked timelines skip this"""
+        if fraction < 1:
+            self.status_bar.showMessage(f"Solving heat up to the seek position... {fraction:.0%}")
+        else:
+            self.status_bar.showMessage("Heat solved up to the seek position", 2000)
+
+    def _toggle_heat_timeline(self, checked):
+        """Play heat from a baked thermal timeline directory, or go back to solving it"""
+        if not checked:
+            self.viz_widget.close_heat_timeline()
+            self.status_bar.showMessage("Heat is solved during playback", 3000)
+            return
+
+        directory = QFileDialog.getExistingDirectory(self, "Open Heat Timeline")
+        if not directory:
+            self.timeline_action.setChecked(False)
+            return
+        try:
+            timeline = self.viz_widget.load_heat_timeline(directory)
+            self.status_bar.showMessage(
+                f"Heat timeline: {len(timeline.layers)} layers, {len(timeline)} frames | {directory}", 5000
+            )
+        except Exception as e:
+            self.timeline_action.setChecked(False)
+            self.status_bar.showMessage(f"Error: {str(e)}", 5000)
 
     def _play_animation(self):
         """Start or resume animation for current layer"""
@@ -321,12 +410,11 @@ class AMVisualizer(QMainWindow):
                 self.viz_widget.start_animation(self.layer_slider.value())
             else:
                 # Resume paused animation
-                self.viz_widget.animation_timer.start(self.viz_widget.animation_speed)
+                self.viz_widget.resume_animation()
     
     def _pause_animation(self):
         """Pause animation"""
-        if self.viz_widget.is_animating:
-            self.viz_widget.animation_timer.stop()
+        self.viz_widget.pause_animation()
     
     def _stop_animation(self):
         """Stop animation"""
@@ -350,7 +438,7 @@ class AMVisualizer(QMainWindow):
     def _open_file(self):
         """Open a CLI file"""
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "Open CLI File", "", "CLI Files (*.cli);;All Files (*)"
+            self, "Open CLI File", "", "CLI Files (*.cli *.cli.gz *.cli.xz *.cli.bz2 *.cli.zst);;All Files (*)"
         )
         
         if file_path:
@@ -358,24 +446,66 @@ class AMVisualizer(QMainWindow):
                 self.status_bar.showMessage(f"Loading {file_path}...")
                 QApplication.processEvents()
                 
+                self.loaded_file_path = file_path
+                self.follow_action.setChecked(False)
+                self.timeline_action.setChecked(False)  # Timelines belong to the file they were baked from
                 self.viz_widget.load_cli(file_path)
+                # Layer 0 is shown right away, the slider grows as layers stream in
                 actual_layers = len(self.viz_widget.cli_data['layers'])
-                self.layer_slider.setRange(0, actual_layers - 1)
+                self.layer_slider.blockSignals(True)
+                self.layer_slider.setRange(0, max(actual_layers - 1, 0))
                 self.layer_slider.setValue(0)
-                self.layer_label.setText(f"Layer: 0/{actual_layers - 1}")
-                
-                header_layers = self.viz_widget.cli_data['total_layers_header']
-                self.status_bar.showMessage(
-                    f"Loaded: {actual_layers} of {header_layers} layers | {file_path}", 
-                    5000
-                )
+                self.layer_slider.blockSignals(False)
+                self.layer_label.setText(f"Layer: 0/{max(actual_layers - 1, 0)}")
             except Exception as e:
                 self.status_bar.showMessage(f"Error: {str(e)}", 5000)
-    
-    def _change_layer(self, layer_idx):
-        """Switch to different layer"""
-        self.layer_label.setText(f"Layer: {layer_idx}/{self.layer_slider.maximum()}")
-        self.viz_widget.plot_layer(layer_idx)
+
+    def _toggle_follow(self, checked):
+        """Start following a growing CLI file, or stop following it"""
+        if not checked:
+            self.viz_widget.stop_following()
+            return
+
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, "Follow CLI File", "", "CLI Files (*.cli);;All Files (*)"
+        )
+        if not file_path:
+            self.follow_action.setChecked(False)
+            return
+        try:
+            self.loaded_file_path = file_path
+            self.layer_slider.blockSignals(True)
+            self.layer_slider.setRange(0, 0)
+            self.layer_slider.setValue(0)
+            self.layer_slider.blockSignals(False)
+            self.layer_label.setText("Layer: 0/0")
+            self.timeline_action.setChecked(False)
+            self.viz_widget.follow_cli(file_path)
+            if self.viz_widget.is_following():
+                self.status_bar.showMessage(f"Following {file_path}...")
+        except Exception as e:
+            self.follow_action.setChecked(False)
+            self.status_bar.showMessage(f"Error: {str(e)}", 5000)
+
+    def _on_layers_loaded(self, count):
+        """Extend the layer slider while layers stream in"""
+        self.layer_slider.setMaximum(max(count - 1, 0))
+        self.layer_label.setText(f"Layer: {self.layer_slider.value()}/{self.layer_slider.maximum()}")
+        if self.viz_widget.is_following():
+            self.status_bar.showMessage(f"Following... {count} layers written")
+        elif self.viz_widget.is_loading():
+            header_layers = self.viz_widget.cli_data['total_layers_header']
+            self.status_bar.showMessage(f"Loading... {count} of {header_layers} layers")
+
+    def _on_loading_finished(self):
+        """Show load summary once streaming has finished"""
+        self.follow_action.setChecked(False)
+        actual_layers = len(self.viz_widget.cli_data['layers'])
+        header_layers = self.viz_widget.cli_data['total_layers_header']
+        self.status_bar.showMessage(
+            f"Loaded: {actual_layers} of {header_layers} layers | {self.loaded_file_path}", 
+            5000
+        )
     
     def _toggle_heat(self, state):
         """Toggle heat visualization"""
@@ -383,16 +513,24 @@ class AMVisualizer(QMainWindow):
         print(f"Toggling heat visualization: {visible}")
         
         if visible:
-            from src.core.heat_model import HeatSource
             # Use a very small sigma for precise microscope view
             sigma = 0.1  # Focused heat spread
             max_temp = 1000  # Fixed max temperature
             
-            self.viz_widget.heat_model = HeatSource(
-                max_temp=max_temp,
-                sigma=sigma
-            )
-            print(f"Heat model params: sigma={sigma:.4f}mm (microscope view)")
+            if self.heat_model_combo.currentText() == "Rosenthal":
+                from src.core.rosenthal import RosenthalSource
+                self.viz_widget.heat_model = RosenthalSource(
+                    max_temp=max_temp,
+                    sigma=sigma,
+                    scan_speed=self.viz_widget.scan_speed
+                )
+            else:
+                from src.core.heat_model import HeatSource
+                self.viz_widget.heat_model = HeatSource(
+                    max_temp=max_temp,
+                    sigma=sigma
+                )
+            print(f"Heat model params: {self.heat_model_combo.currentText()}, sigma={sigma:.4f}mm (microscope view)")
         else:
             self.viz_widget.heat_model = None
         
@@ -400,6 +538,12 @@ class AMVisualizer(QMainWindow):
         if self.viz_widget.cli_data:
             self.viz_widget.plot_layer(self.viz_widget.current_layer)
     
+    def _change_heat_model(self, name):
+        """Switch the heat source model, re-rendering when heat is shown"""
+        if self.heat_toggle.isChecked():
+            self.viz_widget.stop_animation()
+            self._toggle_heat(Qt.CheckState.Checked.value)
+
     def _fit_to_view(self):
         """Fit current view to content"""
         if hasattr(self.viz_widget, 'plotter'):
@@ -0,0 +1,61 @@
+import time
+
+from PyQt6.QtCore import QObject, QTimer
+
+FULL_RENDER_RATE = 10  # Full-quality layer renders per second at most
+PREVIEW_RENDER_RATE = 30  # Preview renders per second at most while dragging
+
+
+class RenderScheduler(QObject):
+    """Coalesce layer render requests and limit how often each kind runs
+
+    Only the latest requested layer is ever rendered. Requests made while
+    the previous render of the same kind is still within its rate limit
+    wait on a single-shot timer, and later requests simply replace the
+    pending layer instead of queueing another render.
+    """
+
+    def __init__(self, render_full, render_preview, full_rate: float = FULL_RENDER_RATE,
+                 preview_rate: float = PREVIEW_RENDER_RATE, parent=None):
+        super().__init__(parent)
+        self.render_full = render_full
+        self.render_preview = render_preview
+        self.full_rate = full_rate
+        self.preview_rate = preview_rate
+        self._pending = None  # Latest requested layer, or None
+        self._pending_preview = False
+        self._last_render = {False: 0.0, True: 0.0}  # Keyed by preview
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._flush)
+
+    def request(self, layer_idx: int, preview: bool = False):
+        """Ask for a layer to be shown, as a cheap preview or at full quality"""
+        self._pending = layer_idx
+        self._pending_preview = preview
+        rate = self.preview_rate if preview else self.full_rate
+        wait = self._last_render[preview] + 1.0 / rate - time.monotonic()
+        wait_ms = max(0, int(wait * 1000))
+        # Keep an earlier deadline, the render picks up the latest layer anyway
+        if not self._timer.isActive() or self._timer.remainingTime() > wait_ms:
+            self._timer.start(wait_ms)
+
+    def cancel(self):
+        """Drop any pending request"""
+        self._timer.stop()
+        self._pending = None
+
+    def is_pending(self):
+        return self._pending is not None
+
+    def _flush(self):
+        if self._pending is None:
+            return
+        layer_idx, preview = self._pending, self._pending_preview
+        self._pending = None
+        if preview:
+            self.render_preview(layer_idx)
+        else:
+            self.render_full(layer_idx)
+        # Measured from the end of the render so the event loop gets time in between
+        self._last_render[preview] = time.monotonic()
@@ -3,22 +3,66 @@
 # =====================
 import numpy as np
 import pyvista as pv
-from PyQt6.QtWidgets import QWidget, QVBoxLayout
-from PyQt6.QtCore import QTimer, pyqtSignal
+from PyQt6.QtWidgets import QApplication, QWidget, QVBoxLayout
+from PyQt6.QtCore import QFileSystemWatcher, QRunnable, QThreadPool, QTimer, pyqtSignal
 from pyvistaqt import BackgroundPlotter
+from src.core.cli_index import INDEXED_LOAD_BYTES
+from src.core.heat_model import heat_image
+from src.core.scan_path import PATH_RESOLUTION, SCAN_SPEED, path_index_at, scan_path
+from src.core.thermal_history import ThermalHistory
+from src.core.thermal_timeline import ThermalTimeline
+from .hatch_mesh import FULL_PART_MAX_BYTES, decimated_hatch_polydata
+from .layer_mesh_cache import PREFETCH_LAYERS, LayerMeshCache, PrefetchTask, build_layer_mesh, prefetch_indices
+from .lod import LOD_FRAME_TIME, PartLod
+from .render_scheduler import RenderScheduler
+import os
+import shutil
+import tempfile
 import time
 
+PREVIEW_MAX_HATCHES = 2000  # Hatches drawn for an uncached layer while scrubbing
+FRAME_INTERVAL = 16  # ms between animation frames
+MAX_HEAT_FRAME_TIME = 0.1  # s of heat solved per frame at most, so a slow frame can't make the next one slower
+HEAT_CATCH_UP_BUDGET = 0.04  # s of wall time per tick spent re-solving heat up to a seek position
+FOLLOW_POLL_INTERVAL = 1000  # ms between size checks while following a growing file
+
+class CacheWriteTask(QRunnable):
+    """Write a loaded file's layers to the geometry cache on a QThreadPool worker"""
+
+    def __init__(self, file_path, cli_data):
+        super().__init__()
+        self.file_path = file_path
+        self.cli_data = cli_data
+
+    def run(self):
+        from src.core.geometry_cache import save_cached
+        try:
+            save_cached(self.file_path, self.cli_data, self.cli_data['header'])
+        except Exception as e:
+            # The cache only speeds up the next load
+            print(f"Could not cache parsed geometry: {e}")
+
+
 class VisualizationWidget(QWidget):
     layer_completed = pyqtSignal(int) # required for full layer after layer animation
+    layers_loaded = pyqtSignal(int)  # Number of layers available while streaming
+    loading_finished = pyqtSignal()
+    frame_rate_measured = pyqtSignal(float)  # Animation frames per second, about once a second
+    scan_progressed = pyqtSignal(float)  # Fraction of the animated layer scanned, every frame
+    heat_catch_up_progressed = pyqtSignal(float)  # Fraction of the heat re-solved up to a seek position
     def __init__(self, parent=None):
         self.accumulated_heat = None
-        self.accumulated_heat_grid = None  # For cross-layer heat accumulation
-        self.laser_actor = None  # Track laser spot actor
+        self.laser_actor = None  # Laser glyph actor, moved every animation frame
+        self.heat_field_grid = None  # Layer heat field grid, updated in place every animation frame
+        self.thermal_solver = None  # Transient heat solution of the animated layer
+        self._thermal_solver_key = None  # (heat model, part bounds) the solver was built for
         super().__init__(parent)
         self.layout = QVBoxLayout(self)
         self.setLayout(self.layout)
-        self.accumulated_heat_grid = None  # For cross-layer heat accumulation
-        self.layer_heat_grids = {}  # Store heat grids for each layer
+        self.thermal_history = None  # Heat of continuously animated layers, on disk with a window in memory
+        self.heat_timeline = None  # Baked heat frames played instead of solving, when they cover the layer
+        self._baked_heat = False  # The animated layer's heat comes from heat_timeline
+        QApplication.instance().aboutToQuit.connect(self.reset_thermal_history)
         
         print("Initializing VisualizationWidget...")
         start_time = time.time()
@@ -47,6 +91,37 @@ class VisualizationWidget(QWidget):
         self.overall_bounds = None  # Store overall part dimensions
         self.view_mode = "layer"  # 'layer' or 'full'
         self.full_part_mesh = None
+        self.full_part_layers = 0  # Layers loaded when full_part_mesh was built
+        self.full_part_max_bytes = FULL_PART_MAX_BYTES
+
+        # Level of detail of the 3D preview: coarser while the camera moves
+        self.full_part_lod = None
+        self.lod_frame_time = LOD_FRAME_TIME  # Target seconds per frame while interacting
+        self._lod_actors = []
+        self._interacting = False
+        self.plotter.iren.add_observer("StartInteractionEvent", self._on_interaction_start)
+        self.plotter.iren.add_observer("EndInteractionEvent", self._on_interaction_end)
+        self.plotter.ren_win.AddObserver("EndEvent", self._on_render_end)
+
+        # Hatches are drawn as lines, shaded as tubes on the GPU
+        self.hatch_line_width = 2
+        self.lines_as_tubes = True
+
+        # Built layer meshes are kept for revisits, and the next layers in
+        # the scrubbing direction are built ahead on a worker thread
+        self.layer_mesh_cache = LayerMeshCache()
+        self.prefetch_pool = QThreadPool()
+        self.prefetch_pool.setMaxThreadCount(1)
+        self.prefetch_layers = PREFETCH_LAYERS
+        # Parsed files are written to the geometry cache off the GUI thread
+        self.cache_pool = QThreadPool()
+        self.cache_pool.setMaxThreadCount(1)
+        QApplication.instance().aboutToQuit.connect(self.cache_pool.waitForDone)
+        self._last_plotted_layer = None
+
+        # Layer requests from the slider are coalesced and rate limited
+        self.render_scheduler = RenderScheduler(self.plot_layer, self.plot_layer_preview, parent=self)
+        self.preview_max_hatches = PREVIEW_MAX_HATCHES
         
         # Store camera position between renders
         self.user_camera_position = None
@@ -55,17 +130,50 @@ class VisualizationWidget(QWidget):
 
         self.animation_timer = QTimer()
         self.animation_timer.timeout.connect(self._animate_step)
-        self.animation_speed = 100  # ms between frames
-        self.animation_path = []
+        # Re-solves live heat up to a seek position in frame-sized chunks,
+        # a budget per tick, with the laser held at the seek position
+        self.heat_catch_up_timer = QTimer()
+        self.heat_catch_up_timer.timeout.connect(self._catch_up_heat)
+        self._heat_catch_up = None  # Scanned length (mm) the heat is being re-solved up to
+        self._heat_scanned = 0.0  # Scanned length (mm) the live heat solution has reached
+        self.animation_speed = FRAME_INTERVAL  # ms between frames
+        self.scan_speed = SCAN_SPEED  # mm/s the laser moves along the hatches
+        self.path_resolution = PATH_RESOLUTION  # mm between path samples
+        self.animation_path = np.empty((0, 3))
+        self.animation_arc = np.empty(0)  # Scanned length (mm) at each path sample
         self.current_path_index = 0
+        # Playback clock: scan time before the last resume plus time since then
+        self._scan_elapsed = 0.0
+        self._scan_resumed_at = 0.0
+        self._last_scan_time = 0.0
+        self._scanned_length = 0.0  # mm of the layer scanned so far
         self.is_animating = False
         self.accumulated_heat = None  # For heat accumulation visualization
+        self.animation_fps = 0.0  # Last measured animation frame rate
+        self._fps_frames = 0
+        self._fps_start = 0.0
 
         self.continuous_mode = False
         #self.layer_complete_timer = QTimer()
         #self.layer_complete_timer.setSingleShot(True)
         #self.layer_complete_timer.timeout.connect(self._start_next_layer)
         self.layer_completed.connect(self._start_next_layer)
+
+        # Streaming loader state: remaining layers are pulled in small batches
+        self._layer_stream = None
+        self._cache_pending = None  # File whose streamed layers get cached once complete
+        self.load_timer = QTimer()
+        self.load_timer.timeout.connect(self._load_more_layers)
+        self.load_batch_time = 0.05  # Seconds of parsing per timer tick
+        self.indexed_load_bytes = INDEXED_LOAD_BYTES
+
+        # Follow mode: a file still being written is re-read as it grows.
+        # The watcher reacts to writes (inotify on Linux), the timer is a fallback poll
+        self._follower = None
+        self.file_watcher = QFileSystemWatcher()
+        self.file_watcher.fileChanged.connect(self._poll_follow)
+        self.follow_timer = QTimer()
+        self.follow_timer.timeout.connect(self._poll_follow)
     
     def _get_path_color(self):
         """Return path color based on current theme"""
@@ -77,44 +185,30 @@ class VisualizationWidget(QWidget):
             return
             
         self.stop_animation()
+        self.render_scheduler.cancel()  # A scrub render still pending would stop the animation
         self.is_animating = True
         self.continuous_mode = continuous
         self.current_layer = layer_idx
         layer = self.cli_data['layers'][layer_idx]
         
-        # Prepare animation path
-        self.animation_path = []
-        z = layer['z']
+        # Prepare animation path: samples along every hatch with their scanned length
+        self.animation_path, self.animation_arc = scan_path(
+            layer.points, layer.offsets, layer.z, self.path_resolution
+        )
         #Create empty grid for this layer's heat
         self.current_layer_heat = None
-
-        for hatch in layer['hatches']:
-            if len(hatch) < 2:
-                continue
-            for i in range(len(hatch) - 1):
-                start = hatch[i]
-                end = hatch[i+1]
-                distance = ((end[0]-start[0])**2 + (end[1]-start[1])**2)**0.5
-                num_segments = max(2, int(distance / 0.1))  # 0.1mm resolution
-                for t in np.linspace(0, 1, num_segments):
-                    x = start[0] + t * (end[0] - start[0])
-                    y = start[1] + t * (end[1] - start[1])
-                    self.animation_path.append((x, y, z))
-        
         self.current_path_index = 0
 
-        # Carry over heat from previous layer with decay
-        if continuous and self.heat_model and layer_idx > 0:
-            prev_layer_idx = layer_idx - 1
-            if prev_layer_idx in self.layer_heat_grids:
-                prev_heat = self.layer_heat_grids[prev_layer_idx]
-                # Apply decay to previous layer's heat
-                decayed_heat = (prev_heat - self.heat_model.base_temp) * self.heat_model.decay_factor
-                self.accumulated_heat_grid = decayed_heat + self.heat_model.base_temp
-            else:
-                self.accumulated_heat_grid = None
-        else:
-            self.accumulated_heat_grid = None
+        # Start the layer's heat solution from the heat left by the layer
+        # below, when layers are played one after another
+        self._heat_path_index = 0
+        self._heat_scanned = 0.0
+        self._baked_heat = bool(self.heat_model and self.heat_timeline is not None
+                                and self.heat_timeline.has_layer(layer_idx))
+        if self.heat_model and self.overall_bounds and not self._baked_heat:
+            solver = self._layer_thermal_solver()
+            history = self._animation_thermal_history(solver) if continuous else None
+            solver.reset(history.start_field(layer_idx) if history is not None else None)
 
         # Only clear if not in continuous mode
         if not continuous:
@@ -124,35 +218,206 @@ class VisualizationWidget(QWidget):
             # Keep previous visualization but update base for new layer
             self._update_base_for_new_layer(layer)
 
-        # Always show initial laser position
-        if self.animation_path:
-            initial_pos = self.animation_path[0]
-            self.laser_actor = pv.Sphere(radius=0.05, center=initial_pos)
-            self.plotter.add_mesh(self.laser_actor, color="red", name="laser_spot")
+        # Laser and heat field actors are created once per layer and then
+        # only moved/updated in place by _animate_step
+        self.laser_actor = None
+        self.heat_field_grid = None
+        if len(self.animation_path):
+            self.laser_actor = self.plotter.add_mesh(pv.Sphere(radius=0.05), color="red", name="laser_spot")
+            self.laser_actor.position = self.animation_path[0]
 
+        self._fps_frames = 0
+        self._fps_start = time.perf_counter()
+        self._scan_elapsed = 0.0
+        self._last_scan_time = 0.0
+        self._scanned_length = 0.0
+        self._scan_resumed_at = time.perf_counter()
         self.animation_timer.start(self.animation_speed)
+
+    def _layer_thermal_solver(self):
+        """Return the thermal solver for the current heat model and part bounds, building it if needed"""
+        bounds = (tuple(self.overall_bounds['min']), tuple(self.overall_bounds['max']))
+        # The model itself is kept: the id of a freed model can be reused by the next one
+        key = self._thermal_solver_key
+        if self.thermal_solver is None or key is None or key[0] is not self.heat_model or key[1] != bounds:
+            self.thermal_solver = self.heat_model.layer_solver(bounds)
+            self._thermal_solver_key = (self.heat_model, bounds)
+        return self.thermal_solver
+
+    def _animation_thermal_history(self, solver):
+        """Return the history continuous playback stacks layers into, creating it in a temporary directory"""
+        n_layers = len(self.cli_data['layers'])
+        history = self.thermal_history
+        if history is None or history.shape != solver.shape or len(history) < n_layers:
+            self.reset_thermal_history()
+            history = ThermalHistory.create(
+                tempfile.mkdtemp(prefix="pathexplorer-heat-"), n_layers, solver.shape, solver.origin,
+                solver.resolution, self.heat_model.base_temp, self.heat_model.decay_factor
+            )
+            self.thermal_history = history
+        return history
+
+    def reset_thermal_history(self):
+        """Forget the heat of previously played layers and delete its file"""
+        if self.thermal_history is not None:
+            directory = self.thermal_history.directory
+            self.thermal_history.close()
+            shutil.rmtree(directory, ignore_errors=True)
+            self.thermal_history = None
+
+    def load_heat_timeline(self, directory):
+        """Play the heat of the layers baked into directory instead of solving it"""
+        timeline = ThermalTimeline.open(directory)
+        if self.cli_data and timeline.n_layers != len(self.cli_data['layers']):
+            timeline.close()
+            raise ValueError(f"Timeline was baked for {timeline.n_layers} layers, "
+                             f"the file has {len(self.cli_data['layers'])}")
+        self.close_heat_timeline()
+        self.heat_timeline = timeline
+        return timeline
+
+    def close_heat_timeline(self):
+        """Go back to solving the heat of every animated layer"""
+        if self.heat_timeline is not None:
+            self.stop_animation()
+            self.heat_timeline.close()
+            self.heat_timeline = None
+
+    def seek_animation(self, fraction):
+        """Move the laser to a fraction of the animated layer's scan length
+
+        Baked heat is shown at that time right away. A live solution can't
+        go back in time, so seeking backwards restarts the layer's solution.
+        The heat is then re-solved up to the new position by
+        _catch_up_heat over the following ticks, with the laser held there
+        until it has caught up.
+        """
+        if not self.is_animating or not len(self.animation_arc):
+            return
+        scanned = min(max(fraction, 0.0), 1.0) * self.animation_arc[-1]
+        self._restart_scan_clock(scanned)
+        self.current_path_index = path_index_at(self.animation_arc, scanned)
+        if self.heat_model and not self._baked_heat and self.thermal_solver is not None:
+            if scanned < self._heat_scanned:
+                history = self.thermal_history if self.continuous_mode else None
+                self.thermal_solver.reset(history.start_field(self.current_layer) if history is not None else None)
+                self._heat_path_index = 0
+                self._heat_scanned = 0.0
+            self._heat_catch_up = scanned
+            if self.laser_actor is not None:
+                self.laser_actor.position = self.animation_path[self.current_path_index]
+            self.heat_catch_up_timer.start(0)
+        elif not self.animation_timer.isActive():
+            self._animate_step()  # Show it while paused
+
+    def _restart_scan_clock(self, scanned):
+        """Continue the playback clock from scanned mm into the layer"""
+        self._scanned_length = scanned
+        self._scan_elapsed = self._last_scan_time = scanned / self.scan_speed
+        self._scan_resumed_at = time.perf_counter()
+
+    def _catch_up_heat(self):
+        """Solve the live heat towards the seek position for one tick's budget
+
+        The path is solved in chunks of MAX_HEAT_FRAME_TIME, like frames of
+        playback, so the sub-step limit never shortens the scan.
+        """
+        target = self._heat_catch_up
+        solver = self.thermal_solver
+        if target is None or solver is None or not self.is_animating:
+            self.heat_catch_up_timer.stop()
+            self._heat_catch_up = None
+            return
+        deadline = time.perf_counter() + HEAT_CATCH_UP_BUDGET
+        while self._heat_scanned < target and time.perf_counter() < deadline:
+            scanned = min(self._heat_scanned + self.scan_speed * MAX_HEAT_FRAME_TIME, target)
+            index = path_index_at(self.animation_arc, scanned)
+            solver.advance(self.animation_path[self._heat_path_index:index + 1],
+                           (scanned - self._heat_scanned) / self.scan_speed, self.scan_speed)
+            self._heat_path_index = index + 1
+            self._heat_scanned = scanned
+        self.current_layer_heat = solver.temperatures
+        self._show_heat_field(solver, self.animation_path[0, 2], solver.temperatures, self.heat_model.max_temp)
+        self.plotter.render()
+        self.heat_catch_up_progressed.emit(self._heat_scanned / target if target else 1.0)
+        if self._heat_scanned >= target:
+            self.heat_catch_up_timer.stop()
+            self._heat_catch_up = None
+            # Playback continues from the seek position
+            self._restart_scan_clock(target)
+
+    def pause_animation(self):
+        """Pause playback, freezing the scan clock"""
+        if self.is_animating and self.animation_timer.isActive():
+            self.animation_timer.stop()
+            self._scan_elapsed += time.perf_counter() - self._scan_resumed_at
+
+    def resume_animation(self):
+        """Continue a paused playback where it stopped"""
+        if self.is_animating and not self.animation_timer.isActive():
+            self._scan_resumed_at = time.perf_counter()
+            self.animation_timer.start(self.animation_speed)
     
     def _update_base_for_new_layer(self, layer):
         """Update visualization for new layer without clearing everything"""
-        z = layer['z']
         path_color = self._get_path_color()
-        
-        # Plot hatches for this layer
-        for hatch in layer['hatches']:
-            if len(hatch) < 2:
-                continue
-            points = np.array([[p[0], p[1], z] for p in hatch])
-            poly = pv.lines_from_points(points)
-            tube = poly.tube(radius=0.01)
-            self.plotter.add_mesh(tube, color=path_color, name=f"hatches_{self.current_layer}")
+        self._add_hatches(self.current_layer, path_color, name=f"hatches_{self.current_layer}")
+
+    def _layer_mesh(self, layer_idx):
+        """Return the hatch mesh of a layer, built once and then served from the cache"""
+        mesh = self.layer_mesh_cache.get(layer_idx)
+        if mesh is None:
+            mesh = build_layer_mesh(self.cli_data['layers'], layer_idx)
+            self.layer_mesh_cache.put(layer_idx, mesh)
+        return mesh
+
+    def _prefetch_layer_meshes(self, layer_idx):
+        """Build the next layers in the scrubbing direction in the background"""
+        direction = 0
+        if self._last_plotted_layer is not None:
+            direction = (layer_idx > self._last_plotted_layer) - (layer_idx < self._last_plotted_layer)
+        self._last_plotted_layer = layer_idx
+        indices = prefetch_indices(layer_idx, direction, len(self.cli_data['layers']), self.prefetch_layers)
+        indices = [index for index in indices if index not in self.layer_mesh_cache]
+        if not indices:
+            return
+        # Supersede a prefetch still running for the previous position
+        self.layer_mesh_cache.generation += 1
+        self.prefetch_pool.clear()
+        self.prefetch_pool.start(PrefetchTask(self.layer_mesh_cache, self.cli_data['layers'], indices))
+
+    def _reset_layer_meshes(self):
+        """Stop prefetching and forget the meshes of the previous file"""
+        self.prefetch_pool.clear()
+        self.layer_mesh_cache.clear()
+        self.prefetch_pool.waitForDone()
+        self._last_plotted_layer = None
+
+    def _add_hatches(self, layer_idx, color, name="hatches"):
+        """Render every hatch of a layer as a single actor"""
+        mesh = self._layer_mesh(layer_idx)
+        if mesh.n_lines == 0:
+            self.plotter.remove_actor(name)
+            return None
+        return self.plotter.add_mesh(
+            mesh,
+            color=color,
+            line_width=self.hatch_line_width,
+            render_lines_as_tubes=self.lines_as_tubes,
+            name=name
+        )
 
     def _animate_step(self):
         """Update animation to next position"""
+        if self._heat_catch_up is not None:
+            return  # The laser waits at the seek position until the heat has caught up
         if self.current_path_index >= len(self.animation_path) or not self.is_animating:
             if self.continuous_mode:
                 # Store current layer's heat before moving to next
-                if self.heat_model and self.current_layer_heat is not None:
-                    self.layer_heat_grids[self.current_layer] = self.current_layer_heat
+                history = self.thermal_history
+                if self.heat_model and self.current_layer_heat is not None and history is not None \
+                        and self.current_layer < len(history):
+                    history.add_layer(self.current_layer, self.current_layer_heat)
                 
                 # Emit signal to move to next layer
                 next_layer = self.current_layer + 1
@@ -161,51 +426,73 @@ class VisualizationWidget(QWidget):
                 self.stop_animation()
             return
 
-        # Get the current position FIRST
-        position = self.animation_path[self.current_path_index]
-        self.current_path_index += 1
-
-        # Update laser position
-        if self.laser_actor:
-            self.laser_actor.translate(
-                [position[0] - self.laser_actor.center[0],
-                position[1] - self.laser_actor.center[1],
-                position[2] - self.laser_actor.center[2]],
-                inplace=True
-            )
+        # Playback follows the wall clock: the laser is wherever the scan has
+        # got to at scan_speed, skipping samples when frames are slow
+        scan_time = self._scan_elapsed + time.perf_counter() - self._scan_resumed_at
+        frame_time = scan_time - self._last_scan_time
+        self._last_scan_time = scan_time
+        # Accumulated so a speed change mid-layer doesn't make the laser jump
+        self._scanned_length += self.scan_speed * frame_time
+        scanned = self._scanned_length
+        index = path_index_at(self.animation_arc, scanned)
+        position = self.animation_path[index]
+        if scanned >= self.animation_arc[-1]:
+            self.current_path_index = len(self.animation_path)  # Done on the next tick
+        else:
+            self.current_path_index = index
 
-        # Always show laser position
-        self.plotter.remove_actor("laser_spot")
-        laser = pv.Sphere(radius=0.05, center=position)
-        self.plotter.add_mesh(laser, color="red", name="laser_spot")
+        # Move the laser glyph
+        if self.laser_actor is not None:
+            self.laser_actor.position = position
         
-        # Update heat visualization if enabled
-        if self.heat_model:
+        # Show the baked frame at this point of the scan, or advance the layer's
+        # heat solution along the path scanned since the last frame
+        if self._baked_heat:
+            timeline = self.heat_timeline
+            temperatures = timeline.frame_at(self.current_layer, scanned / timeline.scan_speed)
+            self._show_heat_field(timeline, position[2], temperatures, timeline.max_temp)
+        elif self.heat_model and self.thermal_solver is not None:
             try:
-                # Create new heat spot
-                spot, cmap, new_temp_grid = self.heat_model.create_moving_spot(
-                    (position[0], position[1]), 
-                    position[2],
-                    prev_temps=self.current_layer_heat,
-                    time_elapsed=self.animation_speed / 1000,
-                    theme=self.theme
-                )
-                
-                # Update current layer's heat grid
-                self.current_layer_heat = new_temp_grid
-                
-                # Update visualization
-                self.plotter.remove_actor("heat_layer")
-                self.plotter.add_mesh(
-                    spot,
-                    cmap="coolwarm",
-                    scalars="Temperature",
-                    clim=[0, self.heat_model.max_temp],
-                    opacity=0.7,
-                    name="heat_layer"
-                )
+                solver = self.thermal_solver
+                solver.advance(self.animation_path[self._heat_path_index:index + 1],
+                               min(frame_time, MAX_HEAT_FRAME_TIME), self.scan_speed)
+                self._heat_path_index = index + 1
+                self._heat_scanned = scanned
+                self.current_layer_heat = solver.temperatures
+                self._show_heat_field(solver, position[2], solver.temperatures, self.heat_model.max_temp)
             except Exception as e:
                 print(f"Error updating heat: {e}")
+
+        self.plotter.render()
+        self.scan_progressed.emit(min(scanned / self.animation_arc[-1], 1.0) if self.animation_arc[-1] else 1.0)
+        self._count_frame()
+
+    def _show_heat_field(self, field, z, temperatures, max_temp):
+        """Draw temperatures on field's grid (origin, resolution, shape), updating the grid in place after the first frame"""
+        if self.heat_field_grid is None:
+            self.heat_field_grid = heat_image(field.origin[0], field.origin[1], z, field.resolution, temperatures)
+            self.plotter.add_mesh(
+                self.heat_field_grid,
+                cmap="coolwarm",
+                scalars="Temperature",
+                clim=[0, max_temp],
+                opacity=0.7,
+                name="heat_layer"
+            )
+        else:
+            self.heat_field_grid["Temperature"].reshape(field.shape)[:] = temperatures
+            self.heat_field_grid.Modified()
+
+    def _count_frame(self):
+        """Measure the animation frame rate and report it about once a second"""
+        self._fps_frames += 1
+        elapsed = time.perf_counter() - self._fps_start
+        if elapsed >= 1.0:
+            self.animation_fps = self._fps_frames / elapsed
+            print(f"Animation: {self.animation_fps:.1f} FPS")
+            self.frame_rate_measured.emit(self.animation_fps)
+            self._fps_frames = 0
+            self._fps_start = time.perf_counter()
     
     def _start_next_layer(self):
         """Start animation for the next layer"""
@@ -226,27 +513,26 @@ class VisualizationWidget(QWidget):
         self.is_animating = False
         self.continuous_mode = False
         self.animation_timer.stop()
-        self.animation_path = []
+        self.heat_catch_up_timer.stop()
+        self._heat_catch_up = None
+        self.animation_path = np.empty((0, 3))
+        self.animation_arc = np.empty(0)
         self.current_path_index = 0
         self.accumulated_heat = None
         # Keep layer heat grids but reset current layer
         self.current_layer_heat = None
         self.plotter.remove_actor("heat_layer")
         self.plotter.remove_actor("laser_spot")
+        self.laser_actor = None
+        self.heat_field_grid = None
     
     def _setup_base_visualization(self, layer):
         """Setup static visualization elements for animation"""
-        z = layer['z']
+        z = layer.z
         path_color = self._get_path_color()
         axis_color = "white" if self.theme == "dark" else "black"
         # Plot hatches as paths
-        for hatch in layer['hatches']:
-            if len(hatch) < 2:
-                continue
-            points = np.array([[p[0], p[1], z] for p in hatch])
-            poly = pv.lines_from_points(points)
-            tube = poly.tube(radius=0.01)
-            self.plotter.add_mesh(tube, color=path_color, name="hatches")
+        self._add_hatches(self.current_layer, path_color)
         
         # Add axes and bounds
         if self.overall_bounds:
@@ -279,38 +565,221 @@ class VisualizationWidget(QWidget):
             self.plotter.reset_camera()  # Automatically fit view after mode change
     
     def load_cli(self, file_path):
-        """Load and parse CLI file"""
+        """Load CLI file, showing layer 0 while the rest streams in"""
         print(f"Loading CLI file: {file_path}")
-        from src.core.cli_parser import parse_cli
-        start_time = time.time()
-        self.cli_data = parse_cli(file_path)
+        from src.core.cli_io import detect_compression
+        from src.core.cli_parser import iter_cli_layers
+        from src.core.geometry_cache import load_cached
+        from src.core.layer_store import LayerStore
+        self._stop_loading()
+        self._close_cli_data()
+        self.load_start_time = time.time()
+        self._cache_pending = None
+
+        # Previously parsed files come straight from the on-disk cache
+        cached = load_cached(file_path)
+        if cached is not None:
+            print(f"Using cached geometry for {file_path}")
+            self.cli_data = cached
+            self._show_first_layer()
+            self._finish_loading()
+            return
+
+        # Huge files are opened through a layer index and decoded on demand,
+        # compressed ones can only be streamed
+        if (os.path.getsize(file_path) >= self.indexed_load_bytes
+                and detect_compression(file_path) is None):
+            self._load_indexed(file_path)
+            return
+
+        header = {}
+        store = LayerStore()
+        self._layer_stream = iter_cli_layers(file_path, header, store)
+        try:
+            first_layer = next(self._layer_stream, None)
+        except Exception:
+            # Unreadable header or first layer, nothing is loading any more
+            self._stop_loading()
+            self.cli_data = None
+            raise
+        self.cli_data = {
+            'layers': store,
+            'total_layers_header': header['total_layers_header'],
+            'actual_layers': len(store),
+            'header': header
+        }
+        self._cache_pending = file_path
+
+        # Bounds of what is loaded so far, refined once streaming finishes
+        self._show_first_layer()
+
+        if first_layer is None:
+            self._finish_loading()
+        else:
+            self.load_timer.start(0)
+
+    def _show_first_layer(self):
+        """Reset per-file view state and plot layer 0"""
         self.full_part_mesh = None  # Reset full part mesh
-        print(f"Parsed {len(self.cli_data['layers'])} layers in {time.time() - start_time:.2f} seconds")
-        
-        # Calculate overall bounding box for entire part
+        self.full_part_lod = None
         self._calculate_overall_bounds()
-        
+
         # Reset camera position for new file
         self.user_camera_position = None
         self.plot_layer(0)
         self.plotter.reset_camera()  # Automatically fit view after loading
-    
+
+    def _load_indexed(self, file_path):
+        """Open a CLI file through its layer index, decoding layers on demand"""
+        from src.core.cli_index import CliFile
+        cli_file = CliFile(file_path)
+        self.cli_data = {
+            'layers': cli_file,
+            'total_layers_header': cli_file.total_layers_header,
+            'actual_layers': len(cli_file),
+            'header': cli_file.header
+        }
+        self._show_first_layer()
+        self._finish_loading()
+
+    def _close_cli_data(self):
+        """Release file handles held by the currently loaded layers"""
+        self.render_scheduler.cancel()
+        self._reset_layer_meshes()
+        self.reset_thermal_history()
+        self.close_heat_timeline()
+        if self._follower is not None:
+            self._end_follow()
+        if self.cli_data and hasattr(self.cli_data['layers'], 'close'):
+            self.cli_data['layers'].close()
+
+    def is_loading(self):
+        """Return True while layers are still streaming in"""
+        return self._layer_stream is not None or self._follower is not None
+
+    def is_following(self):
+        """Return True while a growing file is being followed"""
+        return self._follower is not None
+
+    def follow_cli(self, file_path):
+        """Load a CLI file that is still being written and keep appending new layers"""
+        print(f"Following CLI file: {file_path}")
+        from src.core.cli_follow import CliFollower
+        self._stop_loading()
+        self._close_cli_data()
+        self.load_start_time = time.time()
+        self._cache_pending = None
+
+        self._follower = CliFollower(file_path)
+        self.cli_data = {
+            'layers': self._follower.store,
+            'total_layers_header': 0,
+            'actual_layers': 0,
+            'header': self._follower.header
+        }
+        self.file_watcher.addPath(file_path)
+        self.follow_timer.start(FOLLOW_POLL_INTERVAL)
+        self._poll_follow()
+
+    def _poll_follow(self, *args):
+        """Parse layers appended to the followed file since the last poll"""
+        if self._follower is None:
+            return
+        layers = self._follower.store
+        had_layers = len(layers) > 0
+        try:
+            new_layers = self._follower.poll()
+        except (OSError, ValueError) as e:
+            print(f"Stopped following: {e}")
+            self.stop_following()
+            return
+        self.cli_data['total_layers_header'] = self._follower.header.get('total_layers_header', 0)
+        self.cli_data['actual_layers'] = len(layers)
+        if new_layers and not had_layers:
+            self._show_first_layer()
+
+        if self._follower.finished:
+            # The writer is done, cache the complete file like a regular load
+            self._cache_pending = self._follower.file_path
+            self._end_follow()
+            self._finish_loading()
+        elif new_layers:
+            self._calculate_overall_bounds()
+            self.layers_loaded.emit(len(layers))
+
+    def stop_following(self):
+        """Stop watching the followed file, keeping the layers read so far"""
+        if self._follower is None:
+            return
+        had_layers = len(self._follower.store) > 0
+        try:
+            self._follower.finish()
+        except (OSError, ValueError) as e:
+            print(f"Error while finishing followed file: {e}")
+        self._end_follow()
+        if not had_layers and len(self.cli_data['layers']):
+            self._show_first_layer()
+        self._finish_loading()
+
+    def _end_follow(self):
+        """Release the followed file and stop change detection"""
+        self.follow_timer.stop()
+        if self.file_watcher.files():
+            self.file_watcher.removePaths(self.file_watcher.files())
+        self._follower.close()
+        self._follower = None
+
+    def _load_more_layers(self):
+        """Pull the next batch of layers from the streaming parser"""
+        if self._layer_stream is None:
+            self.load_timer.stop()
+            return
+
+        deadline = time.time() + self.load_batch_time
+        layers = self.cli_data['layers']
+        try:
+            while time.time() < deadline:
+                # The parser appends each layer to the store itself
+                if next(self._layer_stream, None) is None:
+                    self._finish_loading()
+                    return
+        except Exception as e:
+            print(f"Error while streaming layers: {e}")
+            self._finish_loading()
+            return
+        finally:
+            self.cli_data['actual_layers'] = len(layers)
+
+        self.layers_loaded.emit(len(layers))
+
+    def _finish_loading(self):
+        """Finalize a streamed load"""
+        self._stop_loading()
+        self.cli_data['layers'].compact()
+        print(f"Loaded {len(self.cli_data['layers'])} layers in {time.time() - self.load_start_time:.2f} seconds")
+        self._calculate_overall_bounds()
+        if self._cache_pending is not None:
+            self.cache_pool.start(CacheWriteTask(self._cache_pending, dict(self.cli_data)))
+            self._cache_pending = None
+        self.layers_loaded.emit(len(self.cli_data['layers']))
+        self.loading_finished.emit()
+
+    def _stop_loading(self):
+        """Abort any streaming load in progress"""
+        self.load_timer.stop()
+        if self._layer_stream is not None:
+            self._layer_stream.close()
+            self._layer_stream = None
+
     def _calculate_overall_bounds(self):
         """Calculate bounding box for entire part"""
         if not self.cli_data:
             return
             
-        all_points = []
-        for layer in self.cli_data['layers']:
-            z = layer['z']
-            for hatch in layer['hatches']:
-                for point in hatch:
-                    all_points.append([point[0], point[1], z])
-        
-        if all_points:
-            points_array = np.array(all_points)
-            min_coords = np.min(points_array, axis=0)
-            max_coords = np.max(points_array, axis=0)
+        # Cached geometry carries its bounds, no need to scan every point
+        bounds = self.cli_data.get('bounds') or self.cli_data['layers'].bounds()
+        if bounds is not None:
+            min_coords, max_coords = bounds
             self.overall_bounds = {
                 'min': min_coords,
                 'max': max_coords,
@@ -333,7 +802,7 @@ class VisualizationWidget(QWidget):
         self.current_layer = layer_idx
         self.plotter.clear()
         layer = self.cli_data['layers'][layer_idx]
-        z = layer['z']
+        z = layer.z
 
         print(f"Plotting layer {layer_idx}...")
         start_time = time.time()
@@ -343,10 +812,10 @@ class VisualizationWidget(QWidget):
             self.user_camera_position = self.plotter.camera_position
         
         # Show original layer number in debug output
-        print(f"Layer {layer_idx} (Original: {layer['layer_number']})")
+        print(f"Layer {layer_idx} (Original: {layer.layer_number})")
 
         # Print layer statistics
-        num_hatches = len(layer['hatches'])
+        num_hatches = layer.n_hatches
         print(f"Layer {layer_idx}: z={z:.4f}mm, {num_hatches} hatches")
         
         # Set colors based on theme
@@ -357,35 +826,22 @@ class VisualizationWidget(QWidget):
             axis_color = "black"
             grid_color = "black"
         
-        # Plot hatches
-        for hatch in layer['hatches']:
-            if len(hatch) < 2:
-                continue
-            try:
-                # Create tube visualization
-                points = np.array([[p[0], p[1], z] for p in hatch])
-                poly = pv.lines_from_points(points)
-                
-                # Skip invalid geometries
-                if poly.n_points < 2:
-                    continue
-                    
-                tube = poly.tube(radius=0.001)
-                self.plotter.add_mesh(tube, color=path_color, name="hatches")
-            except Exception as e:
-                print(f"Error creating hatch visualization: {e}")
-                continue
+        # Plot all hatches as one actor
+        try:
+            self._add_hatches(layer_idx, path_color)
+        except Exception as e:
+            print(f"Error creating hatch visualization: {e}")
         
         # Add heat visualization if enabled
-        if self.heat_model and layer['hatches']:
+        if self.heat_model and layer.n_hatches:
             # Calculate average hatch spacing for this layer
-            hatch_spacing = self._calculate_hatch_spacing(layer['hatches'])
+            hatch_spacing = self._calculate_hatch_spacing(layer)
             print(f"Layer {layer_idx}: hatch spacing = {hatch_spacing:.4f}mm")
             
             try:
                 # Create precise hatch-centered heat map
                 heat_mesh = self.heat_model.create_hatch_heat_map(
-                    layer['hatches'], 
+                    layer.hatches, 
                     z,
                     hatch_spacing,
                     self.overall_bounds
@@ -415,13 +871,7 @@ class VisualizationWidget(QWidget):
                     
                     # Add hatch lines for reference
                     highlight_color = "yellow" if self.theme == "dark" else "darkred"
-                    for hatch in layer['hatches']:
-                        if len(hatch) < 2:
-                            continue
-                        points = np.array([[p[0], p[1], z] for p in hatch])
-                        poly = pv.lines_from_points(points)
-                        tube = poly.tube(radius=0.001)
-                        self.plotter.add_mesh(tube, color=highlight_color, name="hatches")
+                    self._add_hatches(layer_idx, highlight_color)
             except AttributeError:
                 print("Heat model doesn't support hatch heat maps")
                 self.heat_model = None  # Disable heat visualization
@@ -455,27 +905,51 @@ class VisualizationWidget(QWidget):
         self.plotter.render()
         
         print(f"Layer rendered in {time.time() - start_time:.2f} seconds")
+        self._prefetch_layer_meshes(layer_idx)
+
+    def request_layer(self, layer_idx, preview=False):
+        """Show a layer once the render scheduler gets to it
+
+        Use while scrubbing: only the latest request is rendered, previews
+        while dragging and the full layer at a limited rate.
+        """
+        self.render_scheduler.request(layer_idx, preview)
+
+    def plot_layer_preview(self, layer_idx):
+        """Swap in a layer's hatches without rebuilding the rest of the scene"""
+        if self.view_mode != "layer":
+            self.plot_layer(layer_idx)
+            return
+        self.stop_animation()
+        if not self.cli_data or layer_idx >= len(self.cli_data['layers']):
+            return
+        self.current_layer = layer_idx
 
-    def _calculate_hatch_spacing(self, hatches):
-        """Calculate average hatch spacing for precise heat visualization"""
-        if len(hatches) < 2:
+        # A built mesh is as cheap as it gets, otherwise draw a subset of the hatches
+        mesh = self.layer_mesh_cache.get(layer_idx)
+        if mesh is None:
+            layer = self.cli_data['layers'][layer_idx]
+            mesh = decimated_hatch_polydata(layer.points3d(), layer.offsets, self.preview_max_hatches)
+        self.plotter.remove_actor("heatmap")  # Belongs to the previous layer, redrawn on release
+        if mesh.n_lines:
+            self.plotter.add_mesh(
+                mesh,
+                color=self._get_path_color(),
+                line_width=self.hatch_line_width,
+                render_lines_as_tubes=self.lines_as_tubes,
+                name="hatches",
+                reset_camera=False
+            )
+        else:
+            self.plotter.remove_actor("hatches")
+        self.plotter.render()
+
+    def _calculate_hatch_spacing(self, layer):
+        """Average hatch spacing for precise heat visualization, from the layer statistics"""
+        spacing = float(layer.stats['mean_spacing'])
+        if not np.isfinite(spacing) or spacing <= 0:
             return 0.1  # Default spacing
-            
-        # Collect all y-coordinates (assuming hatches are mostly horizontal)
-        y_coords = []
-        for hatch in hatches:
-            if hatch:
-                y_coords.append(hatch[0][1])
-        
-        if len(y_coords) < 2:
-            return 0.1
-            
-        # Sort and calculate differences
-        y_coords.sort()
-        diffs = [y_coords[i] - y_coords[i-1] for i in range(1, len(y_coords))]
-        
-        # Return average spacing
-        return sum(diffs) / len(diffs)
+        return spacing
 
     def show_full_part(self):
         """Render the entire 3D part"""
@@ -493,16 +967,28 @@ class VisualizationWidget(QWidget):
         
         self.plotter.clear()
         
-        # Render each layer at its actual Z-height
-        for layer in self.cli_data['layers']:
-            z = layer['z']
-            for hatch in layer['hatches']:
-                if len(hatch) < 2:
-                    continue
-                points = np.array([[p[0], p[1], z] for p in hatch])
-                poly = pv.lines_from_points(points)
-                tube = poly.tube(radius=0.001)
-                self.plotter.add_mesh(tube, color=path_color)
+        # Merged mesh of every layer at its actual Z-height plus coarser
+        # levels of detail, rebuilt only when layers were added since
+        layers = self.cli_data['layers']
+        if self.full_part_lod is None or self.full_part_layers != len(layers):
+            self.full_part_lod = PartLod(layers, self.full_part_max_bytes, frame_time=self.lod_frame_time)
+            self.full_part_mesh = self.full_part_lod.full_mesh
+            self.full_part_layers = len(layers)
+            if self.full_part_lod.stride > 1:
+                print(f"Full part exceeds the preview memory cap, showing every {self.full_part_lod.stride}th layer")
+        self._lod_actors = []
+        for level, mesh in enumerate(self.full_part_lod.meshes):
+            actor = None
+            if mesh.n_lines:
+                actor = self.plotter.add_mesh(
+                    mesh,
+                    color=path_color,
+                    line_width=self.hatch_line_width,
+                    render_lines_as_tubes=self.lines_as_tubes,
+                    name=f"full_part_lod{level}"
+                )
+            self._lod_actors.append(actor)
+        self._apply_lod()
         
         # Add axes and bounds
         if self.overall_bounds:
@@ -530,6 +1016,33 @@ class VisualizationWidget(QWidget):
         self.plotter.render()
         print(f"Full part rendered in {time.time() - start_time:.2f} seconds")
     
+    def _apply_lod(self):
+        """Show the full part level of detail suited to the camera and interaction state"""
+        if self.view_mode != "full" or self.full_part_lod is None or not self._lod_actors:
+            return
+        self.full_part_lod.frame_time = self.lod_frame_time
+        level = self.full_part_lod.choose_level(self._interacting, self.plotter.camera.distance)
+        for actor_level, actor in enumerate(self._lod_actors):
+            if actor is not None:
+                actor.visibility = actor_level == level
+
+    def _on_interaction_start(self, *args):
+        """Drop to a coarser level of detail while the camera moves"""
+        self._interacting = True
+        self._apply_lod()
+
+    def _on_interaction_end(self, *args):
+        """Restore full detail once the camera is idle"""
+        self._interacting = False
+        if self.view_mode == "full" and self._lod_actors:
+            self._apply_lod()
+            self.plotter.render()
+
+    def _on_render_end(self, *args):
+        """Record how long the visible level of detail took to render"""
+        if self.view_mode == "full" and self.full_part_lod is not None:
+            self.full_part_lod.record_render_time(self.plotter.renderer.GetLastRenderTimeInSeconds())
+
     def add_heat_visualization(self, path, z):
         """Add heat visualization along a path"""
         if len(path) < 2:
@@ -0,0 +1,25 @@
+import struct
+
+from src.core.cli_parser import iter_cli_layers
+
+
+def _write_binary_cli(path, n_layers=4, hatches_per_layer=3):
+    """Binary CLI file with long (float32) layer and hatch records"""
+    with open(path, 'wb') as f:
+        f.write(b"$$HEADERSTART\n$$BINARY\n$$UNITS/0.001\n$$LAYERS/%d\n$$HEADEREND" % n_layers)
+        for layer in range(n_layers):
+            f.write(struct.pack('<Hf', 127, layer * 30.0))
+            for hatch in range(hatches_per_layer):
+                f.write(struct.pack('<Hii', 132, 1, 1) + struct.pack('<4f', 0.0, hatch * 100.0, 1000.0, hatch * 100.0))
+
+
+def test_closing_binary_layer_stream_early_releases_the_map(tmp_path):
+    path = tmp_path / "part.cli"
+    _write_binary_cli(path)
+
+    layers = iter_cli_layers(str(path))
+    next(layers)
+    next(layers)
+    layers.close()  # Used to raise BufferError while a record view was still exported
+
+    assert len(list(iter_cli_layers(str(path)))) == 4